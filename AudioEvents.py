@@ -0,0 +1,100 @@
+import collections
+import threading
+import time
+
+import pygame
+
+class AudioEvents:
+    # ? Class Constructor
+    def __init__(self, frame_interval = 0.1, poll_interval = 0.01, max_pending = 8) -> None:
+        pygame.mixer.init(frequency = 22050, size = -16, channels = 2, buffer = 512)  # Initialize the mixer module.
+        self.soundChannelsInitializer()
+        self.soundEffectsInitializer()
+
+        # ! At most one cue per name every min_interval seconds; RUN follows the frame rate
+        self.min_interval = {'JOY': 0, 'RUN': frame_interval or 0, 'WHISTLE': 0, 'BOO': 0, 'APPLAUSE': 0}
+        self.last_played = {name: 0.0 for name in self.min_interval}
+
+        # ! Pending cues. A name already waiting is coalesced; cues beyond max_pending are dropped.
+        self.pending = collections.deque()
+        self.queued = set()
+        self.max_pending = max_pending
+
+        # ! Counters (read by Profiling): what happened to the emitted cues
+        self.played = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.rate_limited = 0
+
+        self.poll_interval = poll_interval
+        self.running = True
+        self.player = threading.Thread(target = self.playerLoop, daemon = True)
+        self.player.start()
+
+    # ? Defining Sound Channels for audio
+    def soundChannelsInitializer(self):
+        self.channels = {
+            'JOY': pygame.mixer.Channel(0),
+            'RUN': pygame.mixer.Channel(1),
+            'WHISTLE': pygame.mixer.Channel(2),
+            'BOO': pygame.mixer.Channel(3),
+            'APPLAUSE': pygame.mixer.Channel(4)
+        }
+
+    # ? Initializing Sound Effects (decoded once)
+    def soundEffectsInitializer(self):
+        self.sounds = {}
+        self.sounds['JOY'] = pygame.mixer.Sound("./resources/audio/JOY.mp3")  # Load a sound.
+        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/running-in-grass-6237/]
+        #! License: Free (https://pixabay.com/service/license-summary/)
+        #! Modification: None
+        self.sounds['RUN'] = pygame.mixer.Sound("./resources/audio/RUNNING.mp3")  # Load a sound.
+        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/running-in-grass-6237/]
+        #! License: Free (https://pixabay.com/service/license-summary/)
+        #! Modification: None
+        self.sounds['WHISTLE'] = pygame.mixer.Sound("./resources/audio/WHISTLE.mp3")  # Load a sound.
+        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/referee-whistle-blow-gymnasium-6320/]
+        #! License: Free (https://pixabay.com/service/license-summary/)
+        #! Modification: None
+        self.sounds['BOO'] = pygame.mixer.Sound("./resources/audio/BOO.mp3")  # Load a sound.
+        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/boo-6377/]
+        #! License: Free (https://pixabay.com/service/license-summary/)
+        #! Modification: None
+        self.sounds['APPLAUSE'] = pygame.mixer.Sound("./resources/audio/APPLAUSE.mp3")  # Load a sound.
+        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/crowd-applause-236697/]
+        #! License: Free (https://pixabay.com/service/license-summary/)
+        #! Modification: None
+
+    # ? Emitting a cue from the training loop (a set lookup and a deque append, never blocks)
+    def emit(self, name):
+        if name in self.queued:
+            self.coalesced += 1
+            return
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.queued.add(name)
+        self.pending.append(name)
+
+    # ? Background player
+    def playerLoop(self):
+        while self.running:
+            while self.pending:
+                name = self.pending.popleft()
+                self.queued.discard(name)
+
+                # Cues arriving faster than real time are dropped
+                now = time.monotonic()
+                if now - self.last_played[name] < self.min_interval[name]:
+                    self.rate_limited += 1
+                    continue
+                self.last_played[name] = now
+                self.channels[name].play(self.sounds[name])
+                self.played += 1
+
+            time.sleep(self.poll_interval)
+
+    # ? Stopping the player thread
+    def close(self):
+        self.running = False
+        self.player.join()
@@ -0,0 +1,218 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# ! Offscreen pygame / matplotlib: the suite never opens a window or plays sound
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import matplotlib
+matplotlib.use("Agg")
+
+from CustomEnv import createEnv
+from Layouts import goalCoordinates
+from QLearning import train_q_learning, plan_q_table, test_q_learning, visualize_q_table
+
+# ! Default scaling axes
+grid_sizes = [9, 25, 50]
+danger_counts = [6, 40]
+
+# ? Benchmark layout: the three bars in the middle of the last column, dangers at random safe cells
+def benchmarkLayout(grid_size, no_dangers, seed = 0):
+    goal_coordinates = goalCoordinates(grid_size)
+
+    # ! The start cell [4, 0] and the bars stay free
+    blocked = {(4, 0)} | {tuple(goal_coord) for goal_coord in goal_coordinates.values()}
+    free = [cell for cell in range(grid_size * grid_size) if divmod(cell, grid_size) not in blocked]
+    cells = np.random.default_rng(seed).choice(free, size = min(no_dangers, len(free)), replace = False)
+    danger_coordinates = [{"coordinates": divmod(int(cell), grid_size), "role": "D"} for cell in cells]
+
+    return goal_coordinates, danger_coordinates
+
+def benchmarkEnv(grid_size, no_dangers, compile_model = True, render_mode = "human"):
+    goal_coordinates, danger_coordinates = benchmarkLayout(grid_size, no_dangers)
+    return createEnv(goal_coordinates = goal_coordinates,
+                     danger_coordinates = danger_coordinates,
+                     random_initialization = False,
+                     sound = False,
+                     headless = True,
+                     grid_size = grid_size,
+                     compile_model = compile_model,
+                     render_fps = None,
+                     render_mode = render_mode)
+
+# ? Median seconds per call over `repeat` runs of `number` calls
+def timeit(function, number, repeat = 5):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        runs.append((time.perf_counter() - start) / number)
+    return float(np.median(runs))
+
+# ? Per-call latency of reset / step (compiled and per-step) / checkTermination
+def benchEnv(grid_size, no_dangers, number = 10_000):
+    results = {}
+    for compiled in (True, False):
+        env = benchmarkEnv(grid_size, no_dangers, compile_model = compiled)
+        env.reset()
+        actions = np.random.default_rng(0).integers(0, 4, size = number)
+
+        # ! Random walk that resets at the goal/danger, like a training episode
+        position = [0]
+        def step():
+            _, done, _, _ = env.step(actions[position[0] % number])
+            position[0] += 1
+            if done:
+                env.reset()
+
+        suffix = "" if compiled else "_uncompiled"
+        results["env_reset" + suffix] = (timeit(env.reset, number) * 1e6, "us")
+        results["env_step" + suffix] = (timeit(step, number) * 1e6, "us")
+        if not compiled:
+            env.reset()
+            results["env_check_termination"] = (timeit(env.checkTermination, number) * 1e6, "us")
+    return results
+
+# ? End-to-end headless training throughput
+def benchTraining(grid_size, no_dangers, no_episodes = 200):
+    env = benchmarkEnv(grid_size, no_dangers)
+    np.random.seed(0)
+    env.action_space.seed(0)
+    start = time.perf_counter()
+    train_q_learning(env = env,
+                     no_episodes = no_episodes,
+                     epsilon = 1.0,
+                     epsilon_min = 0.1,
+                     epsilon_decay = 0.995,
+                     alpha = 0.1,
+                     gamma = 0.99,
+                     q_table_save_path = None,
+                     verbose = False)
+    return {"train_episodes_per_s": (no_episodes / (time.perf_counter() - start), "episodes/s")}
+
+# ? Greedy test rollout (planned Q-table, so the episode reaches the goal)
+def benchTesting(grid_size, no_dangers, q_table_path):
+    env = benchmarkEnv(grid_size, no_dangers)
+    plan_q_table(env, gamma = 0.99, q_table_save_path = q_table_path, verbose = False)
+    return {"test_rollout": (timeit(lambda: test_q_learning(env, q_table_path = q_table_path, render = False, verbose = False), 20) * 1e3, "ms")}
+
+# ? Rendering: offscreen rgb_array frames, and the window path (dirty rects + display.update) on the dummy video driver
+def benchRendering(grid_size, no_dangers, number = 100):
+    env = benchmarkEnv(grid_size, no_dangers, render_mode = "rgb_array")
+    env.reset()
+    env.render()
+    fps = 1 / timeit(env.render, number, repeat = 3)
+    env.close()
+
+    # ! The agent walks along the first row, so every frame restores one cell and presents two dirty rects
+    env = benchmarkEnv(grid_size, no_dangers, render_mode = "human")
+    env.reset()
+    env.render()
+    cells = itertools.cycle(range(grid_size))
+    def frame():
+        env.state = next(cells)
+        env.render()
+    human_fps = 1 / timeit(frame, number, repeat = 3)
+    env.close()
+    return {"render_fps": (fps, "frames/s"), "render_fps_human": (human_fps, "frames/s")}
+
+# ? Saving the Q-table heatmaps
+def benchVisualize(grid_size, no_dangers, q_table_path, output_dir):
+    goal_coordinates, danger_coordinates = benchmarkLayout(grid_size, no_dangers)
+    save = lambda: visualize_q_table(danger_coordinates = danger_coordinates,
+                                     goal_coordinates = goal_coordinates,
+                                     q_values_path = q_table_path,
+                                     show = False,
+                                     output_dir = output_dir)
+    return {"visualize_save": (timeit(save, 1, repeat = 3) * 1e3, "ms")}
+
+# ! Units where larger numbers are better (everything else is a time)
+HIGHER_IS_BETTER = {"episodes/s", "frames/s"}
+
+# ? Running the whole suite over grid sizes x danger counts
+def run_benchmarks(grid_sizes = grid_sizes, danger_counts = danger_counts, train_episodes = 200, render = True, visualize = True):
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        q_table_path = os.path.join(temp_dir, "q_table.npy")
+        for grid_size in grid_sizes:
+            for no_dangers in danger_counts:
+                case = {}
+                case.update(benchEnv(grid_size, no_dangers))
+                case.update(benchTraining(grid_size, no_dangers, train_episodes))
+                case.update(benchTesting(grid_size, no_dangers, q_table_path))
+                if render:
+                    case.update(benchRendering(grid_size, no_dangers))
+                if visualize:
+                    case.update(benchVisualize(grid_size, no_dangers, q_table_path, temp_dir))
+
+                for name, (value, unit) in case.items():
+                    results[f"{name}/grid={grid_size}/dangers={no_dangers}"] = {
+                        'value': value,
+                        'unit': unit,
+                        'higher_is_better': unit in HIGHER_IS_BETTER
+                    }
+
+    return {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor()
+        },
+        'results': results
+    }
+
+# ? Comparing against a stored baseline -> list of regressions beyond `threshold` (0.1 : 10% slower)
+def compare_baseline(report, baseline, threshold = 0.1):
+    regressions = []
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        old, new = baseline['results'][name]['value'], result['value']
+        # ! Relative slowdown, positive = worse
+        change = (old - new) / old if result['higher_is_better'] else (new - old) / old
+        if change > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark env stepping, training, testing, rendering and visualization.")
+    parser.add_argument("--output", default = "benchmark_results.json", help = "Where to write the JSON results")
+    parser.add_argument("--baseline", default = None, help = "Baseline JSON to compare against")
+    parser.add_argument("--threshold", type = float, default = 0.1, help = "Allowed relative slowdown (0.1 : 10%%)")
+    parser.add_argument("--grid-sizes", type = int, nargs = "+", default = grid_sizes)
+    parser.add_argument("--danger-counts", type = int, nargs = "+", default = danger_counts)
+    parser.add_argument("--train-episodes", type = int, default = 200)
+    parser.add_argument("--no-render", action = "store_true", help = "Skip the rendering benchmark")
+    parser.add_argument("--no-visualize", action = "store_true", help = "Skip the heatmap benchmark")
+    args = parser.parse_args()
+
+    report = run_benchmarks(grid_sizes = args.grid_sizes,
+                            danger_counts = args.danger_counts,
+                            train_episodes = args.train_episodes,
+                            render = not args.no_render,
+                            visualize = not args.no_visualize)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent = 2)
+    for name, result in report['results'].items():
+        print(f"{name:55s} {result['value']:12.2f} {result['unit']}")
+    print(f"Results: {args.output}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            regressions = compare_baseline(report, json.load(file), args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}.")
@@ -0,0 +1,95 @@
+import json
+import os
+
+import numpy as np
+
+from QStorage import DenseQTable, HashedQTable
+from QTableFile import layoutFingerprint, validateHeader
+
+# ? Writing a file atomically (temp file, fsync, then renamed over the old one)
+def writeAtomically(path, write):
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+# ? Memory-mapped Q-table snapshot of the checkpoint at `path` (None : no checkpoint, or not a memmap one)
+def snapshotPath(path):
+    if not os.path.isfile(path):
+        return None
+    with np.load(path) as data:
+        return str(data['q_snapshot_path']) if 'q_snapshot_path' in data else None
+
+# ? Saving a training checkpoint (written to a temp file, then renamed over the old one)
+def saveCheckpoint(path, q_table, epsilon, episode, env):
+    arrays = {
+        'epsilon': epsilon,
+        'episode': episode,
+        'grid_size': q_table.grid_size,
+        'n_actions': q_table.n_actions,
+        'layout': json.dumps(layoutFingerprint(env))
+    }
+
+    # ! Q-table: a memory-mapped table keeps changing after the checkpoint, so its values are copied into a snapshot
+    # ! next to the checkpoint. Two snapshots alternate: the one the current checkpoint names is only replaced after
+    # ! the new checkpoint points at the other one.
+    previous_snapshot = snapshotPath(path)
+    if isinstance(q_table, DenseQTable) and q_table.memmap_path is not None:
+        q_table.flush()
+        snapshot_path = path + (".q1.npy" if previous_snapshot == path + ".q0.npy" else ".q0.npy")
+        writeAtomically(snapshot_path, lambda file: np.save(file, q_table.memmap))
+        arrays['q_memmap_path'] = q_table.memmap_path
+        arrays['q_snapshot_path'] = snapshot_path
+    elif isinstance(q_table, DenseQTable):
+        arrays['q_values'] = q_table.values
+    else:
+        arrays['q_cells'], arrays['q_rows'] = q_table.items()
+
+    # ! RNG state: np.random (epsilon-greedy), the action space and the env (start sampling)
+    _, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+    arrays['np_random_keys'] = keys
+    arrays['np_random_position'] = position
+    arrays['np_random_has_gauss'] = has_gauss
+    arrays['np_random_cached_gaussian'] = cached_gaussian
+    arrays['generator_states'] = json.dumps({
+        'action_space': env.action_space.np_random.bit_generator.state,
+        'env': env.np_random.bit_generator.state
+    })
+
+    writeAtomically(path, lambda file: np.savez(file, **arrays))
+    if previous_snapshot is not None and previous_snapshot != arrays.get('q_snapshot_path') and os.path.isfile(previous_snapshot):
+        os.remove(previous_snapshot)
+
+# ? Loading a checkpoint and restoring the RNG state -> (q_table, epsilon, episode)
+# ! Raises ValueError when the checkpoint was taken on a different grid or layout (checked before anything is restored)
+def loadCheckpoint(path, env):
+    with np.load(path) as data:
+        grid_size, n_actions = int(data['grid_size']), int(data['n_actions'])
+        layout = json.loads(str(data['layout'])) if 'layout' in data else None
+        validateHeader({'shape': [grid_size, grid_size, n_actions], 'layout': layout}, env)
+
+        # ! The memmap file holds the values of the crash point, the snapshot the ones of the checkpoint
+        if 'q_snapshot_path' in data:
+            snapshot = np.load(str(data['q_snapshot_path']), mmap_mode = "r")
+            memmap_path = str(data['q_memmap_path'])
+            memmap_mode = "r+" if os.path.isfile(memmap_path) else "w+"
+            q_table = DenseQTable(grid_size, n_actions, dtype = snapshot.dtype, memmap_path = memmap_path,
+                                  memmap_mode = memmap_mode)
+            q_table.memmap[:] = snapshot
+            q_table.flush()
+        elif 'q_memmap_path' in data:
+            q_table = DenseQTable(grid_size, n_actions, memmap_path = str(data['q_memmap_path']), memmap_mode = "r+")
+        elif 'q_values' in data:
+            q_table = DenseQTable(grid_size, n_actions, values = data['q_values'].copy())
+        else:
+            q_table = HashedQTable.fromItems(grid_size, n_actions, data['q_cells'], data['q_rows'])
+
+        np.random.set_state(('MT19937', data['np_random_keys'], int(data['np_random_position']),
+                             int(data['np_random_has_gauss']), float(data['np_random_cached_gaussian'])))
+        generator_states = json.loads(str(data['generator_states']))
+        env.action_space.np_random.bit_generator.state = generator_states['action_space']
+        env.np_random.bit_generator.state = generator_states['env']
+
+        return q_table, float(data['epsilon']), int(data['episode'])
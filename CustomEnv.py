@@ -1,7 +1,20 @@
 import sys
 import numpy as np
 import gymnasium as gym
-import pygame
+
+from GridModel import GridModel, RUNNING, GOAL, DANGER
+from StartSampler import StartSampler
+
+# ! pygame is imported lazily (see loadPygame) so headless training never touches it.
+pygame = None
+
+# ? Lazy pygame import
+def loadPygame():
+    global pygame
+    if pygame is None:
+        import pygame as pygame_module
+        pygame = pygame_module
+    return pygame
 
 class CustomEnv(gym.Env):
     # ? Class Constructor
@@ -13,10 +26,15 @@ class CustomEnv(gym.Env):
                     'Bar3' : np.array([5, 8])
                 }, 
                 random_initialization = False,
-                sound = True) -> None:
+                sound = True,
+                headless = False,
+                render_fps = 10,
+                render_mode = "human",
+                start_weights = None) -> None:
         super().__init__()
 
         self.step_count = 0
+        # ! Agent position as a flat cell index: row * grid_size + col (an int, never shared with the caller)
         self.state = None
         self.done = False
         self.info = {}
@@ -24,69 +42,68 @@ class CustomEnv(gym.Env):
         self.cell_size = 50
         self.grid_size = grid_size
         self.goal = goal_coordinates
-        self.random_initialization = random_initialization
+        # ! random_initialization = False : always start at [4, 0]. True / "uniform", "weighted" (start_weights, one
+        # ! per cell) or "visits" (rarely visited cells first) : exploring starts over the safe cells
+        self.random_initialization = "uniform" if random_initialization is True else random_initialization
+        self.start_weights = start_weights
+        self.start_sampler = None
+        self.track_visits = self.random_initialization == "visits"
         self.action_space = gym.spaces.Discrete(4)
-        self.observation_space = gym.spaces.Box(low = 0, high = 4, shape = (2,), dtype = np.int32)
+        self.observation_space = gym.spaces.Discrete(grid_size * grid_size)
         self.sound = sound
+        self.headless = headless
+        # ! render_fps = None / 0 : unthrottled rendering
+        self.render_fps = render_fps
+        self.renderer = None
+        # ! render_mode = "human" : pygame window. "rgb_array" : offscreen surface, render() returns (H, W, 3) frames.
+        self.render_mode = render_mode
 
         self.danger_states = []
-        
-        if self.sound is True: 
-            pygame.mixer.init(frequency = 22050, size = -16, channels = 2, buffer = 512)  # Initialize the mixer module.
-            self.soundChannelsInitializer()
-        
-        self.bgObjectInitializer()
-        
-        self.soundEffectsInitializer()
+
+        # ! Compiled transition/reward tables (see compileModel). None -> per-step computation.
+        self.model = None
+
+        # ! Display and audio are attached on demand. Headless envs wait for the first render().
+        self.display_ready = False
+        self.audio_ready = False
+        self.audio = None
+
+        if not self.headless and self.render_mode == "human":
+            self.attachPygame()
+
+    # ? Attaching pygame display, images and (optionally) audio
+    def attachPygame(self):
+        loadPygame()
+
+        if self.sound is True and self.render_mode == "human" and not self.audio_ready:
+            from AudioEvents import AudioEvents
+            # ! Cues are queued to a background player; RUN is limited to one per rendered frame
+            self.audio = AudioEvents(frame_interval = 1 / self.render_fps if self.render_fps else 0)
+            self.audio_ready = True
+
+        if not self.display_ready:
+            self.bgObjectInitializer()
+            self.display_ready = True
     
-    # ? Defining Sound Channels for audio
-    def soundChannelsInitializer(self):
-        self.channel_joy = pygame.mixer.Channel(0)
-        self.channel_run = pygame.mixer.Channel(1)
-        self.channel_whistle = pygame.mixer.Channel(2)
-        self.channel_boo = pygame.mixer.Channel(3)
-        self.channel_applause = pygame.mixer.Channel(4)
-     
-    # ? Initializing Sound Effects    
-    def soundEffectsInitializer(self):
-        self.sound_effect_joy = pygame.mixer.Sound("./resources/audio/JOY.mp3")  # Load a sound.
-        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/running-in-grass-6237/]
-        #! License: Free (https://pixabay.com/service/license-summary/)
-        #! Modification: None
-        self.sound_effect_run = pygame.mixer.Sound("./resources/audio/RUNNING.mp3")  # Load a sound.
-        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/running-in-grass-6237/]
-        #! License: Free (https://pixabay.com/service/license-summary/)
-        #! Modification: None
-        self.sound_effect_whistle = pygame.mixer.Sound("./resources/audio/WHISTLE.mp3")  # Load a sound.
-        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/referee-whistle-blow-gymnasium-6320/]
-        #! License: Free (https://pixabay.com/service/license-summary/)
-        #! Modification: None
-        self.sound_effect_boo = pygame.mixer.Sound("./resources/audio/BOO.mp3")  # Load a sound.
-        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/boo-6377/]
-        #! License: Free (https://pixabay.com/service/license-summary/)
-        #! Modification: None
-        self.sound_effect_applause = pygame.mixer.Sound("./resources/audio/APPLAUSE.mp3")  # Load a sound.
-        #? Source: Sound Effect by freesound_community from Pixabay [https://pixabay.com/sound-effects/crowd-applause-236697/]
-        #! License: Free (https://pixabay.com/service/license-summary/)
-        #! Modification: None
-
-    # ? Initializing Background Images 
+    # ? Initializing Display and Renderer (sprites are loaded and scaled once)
     def bgObjectInitializer(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((self.cell_size*self.grid_size, self.cell_size*self.grid_size))
-        pygame.display.set_caption('PADM_SS2025_PROJECT')
-        self.background_image = pygame.image.load("./resources/img/FIELD.png").convert_alpha()
-        #? Source: https://www.freepik.com/free-vector/soccer-field-background-with-scoreboard_2077950.htm?
-        #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)
-        #! Modification: Cropped
-        self.obstacle_image = pygame.image.load("./resources/img/DEFENDER.png").convert_alpha()
-        #? Source: https://www.freepik.com/icon/soccer-player_3948791
-        #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)
-        #! Modification: None
-        self.agent_image = pygame.image.load("./resources/img/PLAYER.png").convert_alpha()
-        #? Source: https://www.freepik.com/icon/football_1099672
-        #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)  
-        #! Modification: None
+        from Renderer import FieldRenderer
+
+        if self.render_mode == "rgb_array":
+            # ! Offscreen: no window, frames are read back as arrays and never throttled
+            self.screen = pygame.Surface((self.cell_size*self.grid_size, self.cell_size*self.grid_size))
+            fps = None
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.cell_size*self.grid_size, self.cell_size*self.grid_size))
+            pygame.display.set_caption('PADM_SS2025_PROJECT')
+            fps = self.render_fps
+
+        self.renderer = FieldRenderer(screen = self.screen,
+                                      grid_size = self.grid_size,
+                                      cell_size = self.cell_size,
+                                      danger_states = self.danger_states,
+                                      fps = fps)
      
     # ? Adding Danger States   
     def addDanger(self, coordinates, role):
@@ -94,48 +111,102 @@ class CustomEnv(gym.Env):
             'coordinates': coordinates, 
             'role': role
         })
+        # Layout changed, compiled tables, valid starts and the cached background are stale
+        self.model = None
+        self.start_sampler = None
+        if self.renderer is not None:
+            self.renderer.invalidate()
+
+    # ? Compiling the static layout into lookup tables
+    def compileModel(self):
+        self.model = GridModel.fromEnv(self)
+        return self.model
     
+    # ? Start distribution over the safe cells (built once per layout)
+    def startSampler(self):
+        if self.start_sampler is None:
+            if self.model is not None:
+                self.start_sampler = StartSampler(self.model.cell_outcome, mode = self.random_initialization, weights = self.start_weights)
+            else:
+                self.start_sampler = StartSampler.fromLayout(self.grid_size,
+                                                             goal_coordinates = self.goal.values(),
+                                                             danger_coordinates = [each_danger['coordinates'] for each_danger in self.danger_states],
+                                                             mode = self.random_initialization,
+                                                             weights = self.start_weights)
+        return self.start_sampler
+
+    # ? Cell index <-> [row, col]
+    def toCell(self, coordinates):
+        return int(coordinates[0]) * self.grid_size + int(coordinates[1])
+
+    def toCoordinates(self, cell):
+        return np.array(divmod(int(cell), self.grid_size))
+
     # ? Distance between Agent and Goal
     def distanceToGoal(self):
         # ! Euclidean Distance (Nearest) [sqrt( (x - x_i)^2 + (y - y_i)^2 )]
+        coordinates = self.toCoordinates(self.state)
         return min([
-            np.linalg.norm(self.state - goal_coord)
+            np.linalg.norm(coordinates - goal_coord)
             for goal_coord in self.goal.values()
         ])
 
     # ? Resetting to initial state
-    def reset(self):
-        self.state = np.array([4, 0])
+    def reset(self, seed = None):
+        if seed is not None:
+            super().reset(seed = seed)
+
+        if self.random_initialization:
+            # ! Exploring starts, drawn with the env's generator (seeded / checkpointed with the env)
+            self.state = int(self.startSampler().sample(self.np_random))
+        else:
+            self.state = self.toCell([4, 0])
         self.done = False
         self.reward = 0
         self.step_count = 0
 
-        self.info["Distance to goal"] = self.distanceToGoal()
+        if self.model is not None:
+            self.info["Distance to goal"] = self.model.cell_distance[self.state]
+        else:
+            self.info["Distance to goal"] = self.distanceToGoal()
         
-        if self.sound:
-            self.channel_whistle.play(self.sound_effect_whistle)
+        if self.audio_ready:
+            self.audio.emit("WHISTLE")
 
         return self.state, self.info
 
     # ? Agent's movement
     def step(self, action):
-        if self.sound is True: self.sound_effect_run.play() 
+        if self.audio_ready: self.audio.emit("RUN")
+
+        # ! Fast path: table lookups instead of distance/goal/danger checks
+        if self.model is not None:
+            cell = self.state
+            self.state = int(self.model.next_state[cell, action])
+            self.step_count += 1
+            self.info["Distance to goal"] = self.model.distance[cell, action]
+
+            return self.applyOutcome(self.model.outcome[cell, action], self.model.variable_point[cell, action])
+
+        row, col = divmod(self.state, self.grid_size)
+
         # Up: 0
-        if action == 0 and self.state[0] > 0:
-            self.state[0] -= 1
+        if action == 0 and row > 0:
+            row -= 1
 
         # Down: 1
-        if action == 1 and self.state[0] < self.grid_size - 1:
-            self.state[0] += 1
+        if action == 1 and row < self.grid_size - 1:
+            row += 1
 
         # Right: 2
-        if action == 2 and self.state[1] < self.grid_size - 1:
-            self.state[1] += 1
+        if action == 2 and col < self.grid_size - 1:
+            col += 1
 
         # Left: 3
-        if action == 3 and self.state[1] > 0:
-            self.state[1] -= 1
-        
+        if action == 3 and col > 0:
+            col -= 1
+
+        self.state = row * self.grid_size + col
         self.step_count += 1
         
         return self.checkTermination()
@@ -148,107 +219,103 @@ class CustomEnv(gym.Env):
         # ! Position basis point
         variablePoint = 0.1 if oldDistance > self.info["Distance to goal"] else (0 if oldDistance == self.info["Distance to goal"] else -0.2)
         
-        
+        coordinates = self.toCoordinates(self.state)
+        if True in [np.array_equal(coordinates, goal_coord) for goal_coord in self.goal.values()]:
+            outcome = GOAL
+        elif True in [np.array_equal(coordinates, each_danger['coordinates']) for each_danger in self.danger_states]:
+            outcome = DANGER
+        else:
+            outcome = RUNNING
+
+        return self.applyOutcome(outcome, variablePoint)
+
+    # ? Rewards for the reached cell class
+    def applyOutcome(self, outcome, variablePoint):
         # ! Goal:
-        if np.array_equal(self.state, self.goal['Bar1']) or np.array_equal(self.state, self.goal['Bar2']) or np.array_equal(self.state, self.goal['Bar3']):
-            if self.sound:
-                self.channel_applause.play(self.sound_effect_applause)
+        if outcome == GOAL:
+            if self.audio_ready:
+                self.audio.emit("APPLAUSE")
             self.done = True
             self.reward += 10 - (self.step_count / 100)
         #  ! Danger:
-        elif True in [np.array_equal(self.state, each_danger['coordinates']) for each_danger in self.danger_states]:
-            if self.sound:
-                self.channel_boo.play(self.sound_effect_boo)
+        elif outcome == DANGER:
+            if self.audio_ready:
+                self.audio.emit("BOO")
             self.done = True
             self.reward = abs(self.reward) * (-1) - 10 - (self.step_count / 100)
         else:
             self.done = False
             self.reward += variablePoint - (self.step_count / 100)
 
+        # ! Cell class reached by this step (RUNNING / GOAL / DANGER)
+        self.info["Outcome"] = outcome
+
+        if self.track_visits and self.start_sampler is not None:
+            self.start_sampler.recordVisit(self.state)
+
         return self.state, self.done, self.reward, self.info
 
     # ? Environment Render
     def render(self):
+        if not self.display_ready:
+            self.attachPygame()
+
+        if self.render_mode == "rgb_array":
+            self.renderer.draw(divmod(self.state, self.grid_size), present = False)
+            # Row-major RGB bytes -> contiguous (H, W, 3), cheaper than transposing surfarray output
+            return np.frombuffer(pygame.image.tobytes(self.screen, "RGB"), dtype = np.uint8).reshape(self.screen.get_height(), self.screen.get_width(), 3)
+
         # Closing the window
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            # Window was covered/restored, repaint everything
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.renderer.full_redraw = True
 
-        # Background Color:
-        self.screen.fill((11, 74, 1))
-
-        # Field Grass
-        self.background_image = pygame.transform.scale(
-            self.background_image,
-            (self.cell_size * self.grid_size, self.cell_size * self.grid_size)
-        )
-        
-        self.screen.blit(self.background_image, (0, 0))  # Draw image background
-
-        # # ! Code for grid lines:
-        # for col in range(self.grid_size):
-        #     for row in range(self.grid_size):
-        #         grid = pygame.Rect(col*self.cell_size,
-        #                            row*self.cell_size,
-        #                            self.cell_size,
-        #                            self.cell_size)
-        #         pygame.draw.rect(self.screen,
-        #                          (11, 74, 1),
-        #                          grid,
-        #                          1)
-                
-        # Opponent & GK:
-        for each_danger in self.danger_states:
-            temp_obstacle_image = self.obstacle_image
-            if each_danger['role'] == "GK":
-                self.obstacle_image = pygame.image.load("./resources/img/GOALKEEPER.png").convert_alpha()
-                #? Source: https://www.freepik.com/icon/goalkeeper_3564495
-                #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)  
-                #! Modification: None
-
-            self.obstacle_image = pygame.transform.scale(
-                self.obstacle_image,
-                (self.cell_size, self.cell_size)
-            )
-            self.screen.blit(
-                self.obstacle_image,
-                (each_danger['coordinates'][1]*self.cell_size, each_danger['coordinates'][0]*self.cell_size)
-            )
-            self.obstacle_image = temp_obstacle_image
-            
-            
-        # Agent:
-        self.agent_image = pygame.transform.scale(
-            self.agent_image,
-            (self.cell_size, self.cell_size)
-        )
-        self.screen.blit(
-            self.agent_image,
-            (self.state[1]*self.cell_size, self.state[0]*self.cell_size)
-        )
-        
-
-        pygame.time.wait(100)
-        pygame.display.flip()
+        self.renderer.draw(divmod(self.state, self.grid_size))
 
     # ? Close Function
     def close(self):
-        pygame.quit()
+        if self.display_ready or self.audio_ready:
+            if self.audio is not None:
+                self.audio.close()
+                self.audio = None
+            pygame.quit()
+            self.display_ready = False
+            self.audio_ready = False
+            self.renderer = None
         
 # ? Instance Creator
 def createEnv(goal_coordinates,
             danger_coordinates,
             random_initialization,
-            sound):
+            sound,
+            headless = False,
+            grid_size = 9,
+            compile_model = True,
+            render_fps = 10,
+            render_mode = "human",
+            start_weights = None):
     
-    env = CustomEnv(goal_coordinates = goal_coordinates,
+    env = CustomEnv(grid_size = grid_size,
+                goal_coordinates = goal_coordinates,
                 random_initialization = random_initialization,
-                sound = sound)
+                sound = sound,
+                headless = headless,
+                render_fps = render_fps,
+                render_mode = render_mode,
+                start_weights = start_weights)
 
-    if env.sound:
-        env.channel_joy.play(env.sound_effect_joy)
+    if env.audio_ready:
+        env.audio.emit("JOY")
     for danger in danger_coordinates:
         env.addDanger(coordinates = danger['coordinates'], role = danger['role'])
 
+    # ! Layout is final now, compile it for the fast step path.
+    # ! compile_model = False keeps memory at O(visited cells) on very large fields.
+    if compile_model:
+        env.compileModel()
+
     return env
\ No newline at end of file
@@ -0,0 +1,90 @@
+import heapq
+
+import numpy as np
+
+class DynaPlanner:
+    # ? Class Constructor
+    def __init__(self, n_states, n_actions, planning_steps = 10, gamma = 0.99, alpha = 0.1,
+                 prioritized = False, threshold = 1e-4) -> None:
+        self.n_states = n_states
+        self.n_actions = n_actions
+        # ! planning_steps : simulated Q updates per real env step
+        self.planning_steps = planning_steps
+        self.gamma = gamma
+        self.alpha = alpha
+
+        # ! Learned model, one slot per (cell, action) pair -> flat index cell * n_actions + action.
+        # ! Transitions are deterministic. The env's reward carries the episode's running total (it depends on the path,
+        # ! not only on the pair), so the model keeps the mean of the observed rewards instead of the latest one.
+        n_pairs = n_states * n_actions
+        self.next_state = np.full(n_pairs, -1, dtype = np.int64)
+        self.reward = np.zeros(n_pairs, dtype = np.float64)
+        self.count = np.zeros(n_pairs, dtype = np.int64)
+
+        # ! Observed pairs in insertion order (uniform sampling is one random index)
+        self.observed = np.zeros(n_pairs, dtype = np.int64)
+        self.no_observed = 0
+
+        # ! prioritized = True : prioritized sweeping. Max-heap (negated) of TD errors; `priority` holds each pair's
+        # ! current entry, so older duplicates in the heap are skipped. `predecessors` : cell -> pairs leading into it.
+        self.prioritized = prioritized
+        self.threshold = threshold
+        self.queue = []
+        self.priority = np.zeros(n_pairs, dtype = np.float64) if prioritized else None
+        self.predecessors = {}
+
+        self.simulated_updates = 0
+
+    # ? Recording one real transition, then planning
+    def observe(self, q_table, state, action, reward, next_state):
+        pair = state * self.n_actions + action
+        if self.next_state[pair] < 0:
+            self.observed[self.no_observed] = pair
+            self.no_observed += 1
+        elif self.prioritized and self.next_state[pair] != next_state:
+            self.predecessors[int(self.next_state[pair])].discard(pair)
+        self.next_state[pair] = next_state
+        self.count[pair] += 1
+        self.reward[pair] += (reward - self.reward[pair]) / self.count[pair]
+
+        if self.prioritized:
+            self.predecessors.setdefault(next_state, set()).add(pair)
+            self.push(pair, abs(self.tdError(q_table, pair)))
+            self.sweep(q_table)
+        else:
+            self.replay(q_table)
+
+    # ? TD error of one modelled pair (same target as the real update in train_q_learning)
+    def tdError(self, q_table, pair):
+        state, action = divmod(int(pair), self.n_actions)
+        return self.reward[pair] + self.gamma * q_table.maxValue(int(self.next_state[pair])) - q_table.rowValues(state)[action]
+
+    def simulate(self, q_table, pair):
+        state, action = divmod(int(pair), self.n_actions)
+        q_table.update(state, action, self.reward[pair] + self.gamma * q_table.maxValue(int(self.next_state[pair])), self.alpha)
+        self.simulated_updates += 1
+        return state
+
+    # ? Dyna-Q: planning_steps updates on uniformly drawn observed pairs
+    def replay(self, q_table):
+        for index in np.random.randint(self.no_observed, size = self.planning_steps):
+            self.simulate(q_table, self.observed[index])
+
+    # ? Prioritized sweeping: largest TD errors first, then the pairs leading into the updated cell
+    def push(self, pair, priority):
+        if priority > self.threshold and priority > self.priority[pair]:
+            self.priority[pair] = priority
+            heapq.heappush(self.queue, (-priority, int(pair)))
+
+    def sweep(self, q_table):
+        updates = 0
+        while self.queue and updates < self.planning_steps:
+            priority, pair = heapq.heappop(self.queue)
+            if -priority != self.priority[pair]:
+                continue  # Stale entry, the pair was queued again with a larger priority
+            self.priority[pair] = 0.0
+
+            state = self.simulate(q_table, pair)
+            updates += 1
+            for predecessor in self.predecessors.get(state, ()):
+                self.push(predecessor, abs(self.tdError(q_table, predecessor)))
@@ -0,0 +1,82 @@
+import numpy as np
+
+from GridModel import GOAL
+
+class EarlyStopping:
+    # ? Class Constructor
+    def __init__(self, check_every = 50, delta_tolerance = None, policy_patience = 5, success_rate = 0.9,
+                 window = 100, min_episodes = 0) -> None:
+        # ! Checked every check_every episodes. Training stops once every enabled criterion holds (None : disabled):
+        # !  delta_tolerance : max |dQ| since the previous check is below it. Off by default: with a constant alpha and
+        # !                    the running-total reward, one long episode still moves some Q-values by several points.
+        # !  policy_patience : the greedy policy did not change for this many consecutive checks
+        # !  success_rate    : goal rate over the last `window` episodes is at least this
+        self.check_every = check_every
+        self.delta_tolerance = delta_tolerance
+        self.policy_patience = policy_patience
+        self.success_rate = success_rate
+        self.window = window
+        self.min_episodes = min_episodes
+
+        self.previous_q = None
+        self.previous_policy = None
+        self.stable_checks = 0
+
+        # ! Outcome: reason is set when training stops (or by finish() when the episode budget runs out)
+        self.stopped = False
+        self.stopped_episode = None
+        self.reason = None
+        self.history = []
+
+    # ? One check after a finished episode -> True : stop training
+    def check(self, episode, q_table, metrics):
+        if episode % self.check_every != 0:
+            return False
+
+        q_values = np.array(q_table.toDense(), dtype = np.float64).reshape(-1, q_table.n_actions)
+        policy = q_values.argmax(axis = 1)
+
+        max_delta = np.inf if self.previous_q is None else float(np.abs(q_values - self.previous_q).max())
+        if self.previous_policy is not None and np.array_equal(policy, self.previous_policy):
+            self.stable_checks += 1
+        else:
+            self.stable_checks = 0
+        self.previous_q, self.previous_policy = q_values, policy
+
+        start = max(0, metrics.count - self.window)
+        success = float((metrics.terminals[start:metrics.count] == GOAL).mean()) if metrics.count else 0.0
+
+        self.history.append((episode, max_delta, self.stable_checks, success))
+
+        met = []
+        if self.delta_tolerance is not None:
+            if max_delta >= self.delta_tolerance:
+                return False
+            met.append(f"max |dQ| {max_delta:.1e} < {self.delta_tolerance:.0e}")
+        if self.policy_patience is not None:
+            if self.stable_checks < self.policy_patience:
+                return False
+            met.append(f"greedy policy unchanged for {self.stable_checks} checks")
+        if self.success_rate is not None:
+            if success < self.success_rate:
+                return False
+            met.append(f"success rate {success:.0%} >= {self.success_rate:.0%}")
+        if episode < self.min_episodes or not met:
+            return False
+
+        self.stopped = True
+        self.stopped_episode = episode
+        self.reason = "converged: " + ", ".join(met)
+        return True
+
+    # ? Called when training ran out of episodes without stopping early
+    def finish(self, episode):
+        if self.stopped:
+            return
+        self.stopped_episode = episode
+        if self.history:
+            _, max_delta, stable_checks, success = self.history[-1]
+            self.reason = (f"not converged after {episode} episodes: max |dQ| {max_delta:.1e}, "
+                           f"policy stable for {stable_checks} checks, success rate {success:.0%}")
+        else:
+            self.reason = f"not converged after {episode} episodes (no check ran)"
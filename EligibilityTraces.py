@@ -0,0 +1,82 @@
+import numpy as np
+
+class EligibilityTraces:
+    TYPES = ("accumulating", "replacing")
+    ALGORITHMS = ("q", "sarsa")
+
+    # ? Class Constructor
+    def __init__(self, n_states, n_actions, trace_lambda = 0.9, gamma = 0.99, alpha = 0.1,
+                 trace_type = "accumulating", algorithm = "q", min_trace = 1e-3) -> None:
+        # ! trace_type : "accumulating" (e += 1 per visit) or "replacing" (e = 1)
+        # ! algorithm  : "q" -> Watkins's Q(lambda), traces are cut after an exploratory action. "sarsa" -> SARSA(lambda).
+        if trace_type not in self.TYPES:
+            raise ValueError(f"Unknown trace type '{trace_type}'. Use 'accumulating' or 'replacing'.")
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown trace algorithm '{algorithm}'. Use 'q' or 'sarsa'.")
+        self.n_actions = n_actions
+        self.trace_lambda = trace_lambda
+        self.gamma = gamma
+        self.alpha = alpha
+        self.trace_type = trace_type
+        self.algorithm = algorithm
+        # ! Traces that decayed below min_trace are dropped (after k steps a trace is (gamma * lambda)^k)
+        self.min_trace = min_trace
+
+        # ! One trace per (cell, action) pair, flat index cell * n_actions + action (same layout as the dense Q-table).
+        # ! Only the pairs touched since the last reset are kept in `active`, so a step costs O(active), not O(S x A).
+        n_pairs = n_states * n_actions
+        self.trace = np.zeros(n_pairs, dtype = np.float64)
+        self.is_active = np.zeros(n_pairs, dtype = bool)
+        self.active = np.zeros(n_pairs, dtype = np.int64)
+        self.no_active = 0
+
+        self.cuts = 0
+
+    # ? One real transition: TD error of (state, action), applied to every traced pair at once
+    # ! values : the dense (cells x actions) Q array, updated in place. next_action : the action that will be taken
+    # ! in next_state (None : the episode ended).
+    def step(self, values, state, action, reward, next_state, next_action):
+        flat = values.reshape(-1)
+        pair = state * self.n_actions + action
+
+        # ! Same bootstrap as the one-step update in train_q_learning (SARSA bootstraps on the action it will take)
+        greedy_value = values[next_state].max()
+        if self.algorithm == "sarsa" and next_action is not None:
+            td_error = reward + self.gamma * values[next_state, next_action] - flat[pair]
+        else:
+            td_error = reward + self.gamma * greedy_value - flat[pair]
+        exploratory = next_action is not None and values[next_state, next_action] < greedy_value
+
+        if not self.is_active[pair]:
+            self.is_active[pair] = True
+            self.active[self.no_active] = pair
+            self.no_active += 1
+        if self.trace_type == "accumulating":
+            self.trace[pair] += 1.0
+        else:
+            self.trace[pair] = 1.0
+
+        active = self.active[:self.no_active]
+        flat[active] += self.alpha * td_error * self.trace[active]
+
+        # ! Episode over, or Watkins's cut-off: the greedy target no longer follows the behaviour policy
+        if next_action is None or (self.algorithm == "q" and exploratory):
+            self.cuts += next_action is not None
+            self.reset()
+            return
+
+        self.trace[active] *= self.gamma * self.trace_lambda
+        keep = self.trace[active] >= self.min_trace
+        if not keep.all():
+            dropped = active[~keep]
+            self.trace[dropped] = 0.0
+            self.is_active[dropped] = False
+            self.no_active = int(keep.sum())
+            self.active[:self.no_active] = active[keep]
+
+    # ? Clearing every trace (start of an episode)
+    def reset(self):
+        active = self.active[:self.no_active]
+        self.trace[active] = 0.0
+        self.is_active[active] = False
+        self.no_active = 0
@@ -0,0 +1,73 @@
+import os
+import queue
+import threading
+
+import numpy as np
+
+class EpisodeRecorder:
+    # ? Class Constructor
+    def __init__(self, capacity = 500, output_dir = "./Learning Data/episodes", frame_shape = None) -> None:
+        # ! Ring buffer of the last `capacity` frames, allocated once (on the first frame if the shape is unknown)
+        self.capacity = capacity
+        self.output_dir = output_dir
+        self.frames = None if frame_shape is None else np.zeros((capacity, *frame_shape), dtype = np.uint8)
+        self.head = 0
+        self.count = 0
+
+        self.best_reward = -np.inf
+        self.worst_reward = np.inf
+
+        # ! Compression and disk I/O run on a background thread
+        self.jobs = queue.Queue()
+        self.writer = threading.Thread(target = self.writerLoop, daemon = True)
+        self.writer.start()
+
+    # ? Adding one frame (overwrites the oldest one once the buffer is full)
+    def addFrame(self, frame):
+        if self.frames is None:
+            self.frames = np.zeros((self.capacity, *frame.shape), dtype = np.uint8)
+        self.frames[self.head] = frame
+        self.head = (self.head + 1) % self.capacity
+        self.count += 1
+
+    # ? Buffered frames of the current episode, oldest first
+    def lastFrames(self):
+        if self.frames is None:
+            return np.zeros((0,), dtype = np.uint8)
+        if self.count < self.capacity:
+            return self.frames[:self.count].copy()
+        return np.concatenate((self.frames[self.head:], self.frames[:self.head]))
+
+    # ? Queueing the buffered frames for writing as <name>.npz
+    def saveEpisode(self, name, **metadata):
+        self.jobs.put((os.path.join(self.output_dir, name + ".npz"), self.lastFrames(), metadata))
+
+    # ? Closing an episode: keeps the best and the worst one seen so far
+    def endEpisode(self, episode, total_reward):
+        if total_reward > self.best_reward:
+            self.best_reward = total_reward
+            self.saveEpisode("best", episode = episode, total_reward = total_reward)
+        if total_reward < self.worst_reward:
+            self.worst_reward = total_reward
+            self.saveEpisode("worst", episode = episode, total_reward = total_reward)
+
+        self.head = 0
+        self.count = 0
+
+    # ? Background writer (compressed archive, written to a temp file then renamed)
+    def writerLoop(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            path, frames, metadata = job
+            os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as file:
+                np.savez_compressed(file, frames = frames, **metadata)
+            os.replace(temp_path, path)
+
+    # ? Waiting for queued episodes and stopping the writer
+    def close(self):
+        self.jobs.put(None)
+        self.writer.join()
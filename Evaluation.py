@@ -0,0 +1,89 @@
+import numpy as np
+
+from GridModel import RUNNING, GOAL, DANGER, transitionReward
+from QStorage import flatQValues
+
+# ? Greedy policy, extracted once -> one action per cell
+def greedyPolicy(q_table):
+    # ! Accepts a QStorage table or a (grid, grid, actions) / (cells, actions) array
+    q_values = q_table.toDense() if hasattr(q_table, 'toDense') else q_table
+    return np.argmax(flatQValues(q_values), axis = 1)
+
+# ? Steps until the policy ends an episode from every cell (-1 : never, the policy runs in a cycle)
+def stepsToTermination(model, policy):
+    cells = np.arange(model.n_states)
+    next_cell = model.next_state[cells, policy]
+
+    steps = np.full(model.n_states, -1, dtype = np.int64)
+    steps[model.done[cells, policy]] = 1
+
+    # ! Walking backwards from the terminal transitions: a cell ends in k + 1 steps if its successor ends in k.
+    # ! Cells that are never reached this way lead into a cycle (transitions and policy are deterministic).
+    k = 1
+    while True:
+        new = (steps == -1) & (steps[next_cell] == k)
+        if not new.any():
+            break
+        k += 1
+        steps[new] = k
+
+    return steps
+
+# ? Rolling out the greedy policy from every non-terminal start cell at once
+def evaluate_policy(model, q_table = None, policy = None, start_cells = None, max_steps = 200):
+    policy = greedyPolicy(q_table) if policy is None else np.asarray(policy)
+    if start_cells is None:
+        start_cells = np.flatnonzero(model.cell_outcome == RUNNING)
+    start_cells = np.asarray(start_cells, dtype = np.int64)
+
+    steps_to_end = stepsToTermination(model, policy)[start_cells]
+    looping = steps_to_end == -1
+    # ! Episode length: the terminal step, or max_steps if the goal/danger is further away. Cycles are not rolled out.
+    lengths = np.where(looping, 0, np.minimum(steps_to_end, max_steps))
+
+    n_starts = len(start_cells)
+    returns = np.zeros(n_starts)
+    rewards = np.zeros(n_starts)
+    terminal = np.full(n_starts, RUNNING, dtype = np.int8)
+
+    # ! Lockstep rollout, the active set shrinks as episodes end
+    active = np.flatnonzero(lengths > 0)
+    cells = start_cells[active]
+    step_count = 0
+    while len(active):
+        step_count += 1
+        actions = policy[cells]
+        outcome = model.outcome[cells, actions]
+        rewards[active] = transitionReward(outcome, model.variable_point[cells, actions], rewards[active], step_count)
+        # Same total as test_q_learning: the sum of the (cumulative) rewards returned by env.step
+        returns[active] += rewards[active]
+        cells = model.next_state[cells, actions]
+
+        ended = lengths[active] == step_count
+        terminal[active[ended]] = outcome[ended]
+        active, cells = active[~ended], cells[~ended]
+
+    returns[looping] = np.nan
+    success = terminal == GOAL
+    finished = ~looping
+
+    return {
+        'start_cells': start_cells,
+        'success': success,
+        'terminal': terminal,
+        'looping': looping,
+        'truncated': finished & (terminal == RUNNING),
+        'steps': np.where(looping, -1, lengths),
+        'returns': returns,
+        'success_rate': float(success.mean()) if n_starts else 0.0,
+        'danger_rate': float((terminal == DANGER).mean()) if n_starts else 0.0,
+        'loop_rate': float(looping.mean()) if n_starts else 0.0,
+        'mean_steps': float(lengths[finished].mean()) if finished.any() else float('nan'),
+        'mean_return': float(returns[finished].mean()) if finished.any() else float('nan')
+    }
+
+# ? One-line report
+def printEvaluation(result):
+    print(f"Starts: {len(result['start_cells'])}, Success: {result['success_rate']:.0%}, "
+          f"Danger: {result['danger_rate']:.0%}, Loops: {result['loop_rate']:.0%}, "
+          f"Mean Steps: {result['mean_steps']:.1f}, Mean Return: {result['mean_return']:.2f}")
@@ -1,25 +1,57 @@
 import os
 
 class FileSystem:
-    def __init__(self) -> None: 
-        pass
-    
-    def getFiles(self, folder_path = './Learning Data', extension = None):   
+    def __init__(self, output_dir = './Learning Data') -> None:
+        self.output_dir = output_dir
+        os.makedirs(self.output_dir, exist_ok = True)
+
+    def getFiles(self, folder_path = None, extension = None):
+        folder_path = folder_path or self.output_dir
         files = [
             os.path.join(folder_path, f)
             for f in os.listdir(folder_path)
-            if f.endswith(extension) and os.path.isfile(os.path.join(folder_path, f))
+            if (extension is None or f.endswith(extension)) and os.path.isfile(os.path.join(folder_path, f))
         ]
         sort_files = sorted(files, key=lambda x: os.path.getctime(x))
-        
+
         return sort_files
-    
 
-    # Incremental File name selection
-    def getNewFileName(self, extension):
-        files = self.getFiles(extension = extension)
-        lastFile =  None if len(files) <= 0 else os.path.splitext(os.path.basename(files[len(files)-1]))[0]
-        
-        newFileName = int(lastFile)+1 if lastFile is not None else 1
+    # ? Counter file holding the next free number for one extension (e.g. ".counter.png")
+    def counterPath(self, extension):
+        return os.path.join(self.output_dir, ".counter" + extension)
+
+    def readCounter(self, extension):
+        try:
+            with open(self.counterPath(extension)) as file:
+                return int(file.read().strip() or 1)
+        except (FileNotFoundError, ValueError):
+            # ! No (valid) counter yet: one scan of the existing numeric names, non-numeric names are ignored
+            numbers = [int(os.path.splitext(f)[0]) for f in os.listdir(self.output_dir)
+                       if f.endswith(extension) and os.path.splitext(f)[0].isdigit()]
+            return max(numbers, default = 0) + 1
 
-        return str(newFileName)
\ No newline at end of file
+    def writeCounter(self, extension, value):
+        # Unique temp name per process, then an atomic rename over the old counter
+        temp_path = f"{self.counterPath(extension)}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            file.write(str(value))
+        os.replace(temp_path, self.counterPath(extension))
+
+    # ? Incremental File name selection
+    # ! O(1): the counter gives the next number, exclusive creation (O_EXCL) claims it. Two processes can
+    # ! read the same counter value, but only one of them can create the file; the other moves on to the next number.
+    def getNewFilePath(self, extension):
+        number = self.readCounter(extension)
+        while True:
+            path = os.path.join(self.output_dir, str(number) + extension)
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                number += 1
+
+        self.writeCounter(extension, number + 1)
+        return path
+
+    def getNewFileName(self, extension):
+        return os.path.splitext(os.path.basename(self.getNewFilePath(extension)))[0]
@@ -0,0 +1,119 @@
+import numpy as np
+
+# ! Outcome classes of a cell
+RUNNING = 0
+GOAL = 1
+DANGER = 2
+
+# ? Reward after a transition (vectorized CustomEnv.checkTermination arithmetic)
+def transitionReward(outcome, variable_point, rewards, step_counts):
+    stepPenalty = step_counts / 100
+    return np.where(outcome == GOAL, rewards + (10 - stepPenalty),
+           np.where(outcome == DANGER, np.abs(rewards) * (-1) - 10 - stepPenalty,
+                    rewards + (variable_point - stepPenalty)))
+
+class GridModel:
+    # ? Class Constructor
+    def __init__(self,
+                grid_size,
+                next_state,
+                done,
+                outcome,
+                distance,
+                variable_point,
+                cell_outcome,
+                cell_distance,
+                start_state) -> None:
+
+        self.grid_size = int(grid_size)
+        self.n_states = self.grid_size * self.grid_size
+        self.n_actions = next_state.shape[1]
+        self.start_state = int(start_state)
+
+        # ! Per (cell, action): where the agent lands and what happens there
+        self.next_state = next_state
+        self.done = done
+        self.outcome = outcome
+        self.distance = distance
+        self.variable_point = variable_point
+
+        # ! Per cell: class and distance to the nearest goal
+        self.cell_outcome = cell_outcome
+        self.cell_distance = cell_distance
+
+    # ? Building the tables from a static layout
+    @classmethod
+    def fromLayout(cls, grid_size, goal_coordinates, danger_coordinates, start_state = (4, 0)):
+        n_states = grid_size * grid_size
+        rows, cols = np.divmod(np.arange(n_states, dtype = np.int64), grid_size)
+
+        # ! Same action order as CustomEnv.step -> Up: 0, Down: 1, Right: 2, Left: 3
+        moves = np.array([[-1, 0], [1, 0], [0, 1], [0, -1]], dtype = np.int64)
+        next_rows = np.clip(rows[:, None] + moves[None, :, 0], 0, grid_size - 1)
+        next_cols = np.clip(cols[:, None] + moves[None, :, 1], 0, grid_size - 1)
+        next_state = (next_rows * grid_size + next_cols).astype(np.int32)
+
+        # ! Euclidean Distance (Nearest), one goal at a time to keep memory at O(cells)
+        cell_distance = np.full(n_states, np.inf)
+        for goal_coord in goal_coordinates:
+            dr = rows - int(goal_coord[0])
+            dc = cols - int(goal_coord[1])
+            np.minimum(cell_distance, np.sqrt(dr * dr + dc * dc), out = cell_distance)
+
+        # ! Goal wins over danger, same priority as CustomEnv.checkTermination
+        cell_outcome = np.full(n_states, RUNNING, dtype = np.int8)
+        for danger_coord in danger_coordinates:
+            cell_outcome[int(danger_coord[0]) * grid_size + int(danger_coord[1])] = DANGER
+        for goal_coord in goal_coordinates:
+            cell_outcome[int(goal_coord[0]) * grid_size + int(goal_coord[1])] = GOAL
+
+        outcome = cell_outcome[next_state]
+        distance = cell_distance[next_state]
+
+        # ! Position basis point
+        old_distance = cell_distance[:, None]
+        variable_point = np.where(old_distance > distance, 0.1, np.where(old_distance == distance, 0.0, -0.2))
+
+        return cls(grid_size = grid_size,
+                   next_state = next_state,
+                   done = outcome != RUNNING,
+                   outcome = outcome,
+                   distance = distance,
+                   variable_point = variable_point,
+                   cell_outcome = cell_outcome,
+                   cell_distance = cell_distance,
+                   start_state = int(start_state[0]) * grid_size + int(start_state[1]))
+
+    # ? Building the tables from a CustomEnv / VectorCustomEnv instance
+    @classmethod
+    def fromEnv(cls, env, start_state = (4, 0)):
+        return cls.fromLayout(grid_size = env.grid_size,
+                              goal_coordinates = [np.asarray(goal_coord) for goal_coord in env.goal.values()],
+                              danger_coordinates = [each_danger['coordinates'] for each_danger in env.danger_states],
+                              start_state = start_state)
+
+    # ? Exporting / Importing the compiled tables
+    def save(self, path):
+        np.savez_compressed(path,
+                            grid_size = self.grid_size,
+                            start_state = self.start_state,
+                            next_state = self.next_state,
+                            done = self.done,
+                            outcome = self.outcome,
+                            distance = self.distance,
+                            variable_point = self.variable_point,
+                            cell_outcome = self.cell_outcome,
+                            cell_distance = self.cell_distance)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(grid_size = int(data['grid_size']),
+                       next_state = data['next_state'],
+                       done = data['done'],
+                       outcome = data['outcome'],
+                       distance = data['distance'],
+                       variable_point = data['variable_point'],
+                       cell_outcome = data['cell_outcome'],
+                       cell_distance = data['cell_distance'],
+                       start_state = int(data['start_state']))
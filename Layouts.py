@@ -0,0 +1,258 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from GridModel import GridModel
+from QLearning import planningArrays, valueIteration, plannedQValues
+from QStorage import flatQValues
+
+# ? Bars in the middle of the last column (the default field's Bar1..Bar3 for grid_size = 9)
+def goalCoordinates(grid_size):
+    middle = grid_size // 2
+    return {
+        'Bar1' : np.array([middle - 1, grid_size - 1]),
+        'Bar2' : np.array([middle, grid_size - 1]),
+        'Bar3' : np.array([middle + 1, grid_size - 1])
+    }
+
+# ? Stable id of a layout (same field -> same hash, independent of the generation order)
+def layoutHash(grid_size, goal_coordinates, danger_coordinates):
+    goals = sorted((int(g[0]), int(g[1])) for g in goal_coordinates.values())
+    dangers = sorted((int(d['coordinates'][0]), int(d['coordinates'][1]), d['role']) for d in danger_coordinates)
+    return hashlib.blake2b(repr((grid_size, goals, dangers)).encode(), digest_size = 8).hexdigest()
+
+# ? Can the agent reach a bar from the start cell without crossing a defender? (flood fill on the grid)
+def isReachable(grid_size, goal_coordinates, danger_coordinates, start_state = (4, 0)):
+    free = np.ones((grid_size, grid_size), dtype = bool)
+    for danger in danger_coordinates:
+        free[danger['coordinates'][0], danger['coordinates'][1]] = False
+    goal = np.zeros((grid_size, grid_size), dtype = bool)
+    for goal_coord in goal_coordinates.values():
+        goal[goal_coord[0], goal_coord[1]] = True
+
+    reached = np.zeros((grid_size, grid_size), dtype = bool)
+    reached[start_state[0], start_state[1]] = True
+    while True:
+        grown = reached.copy()
+        grown[1:, :] |= reached[:-1, :]
+        grown[:-1, :] |= reached[1:, :]
+        grown[:, 1:] |= reached[:, :-1]
+        grown[:, :-1] |= reached[:, 1:]
+        grown &= free
+        if (grown & goal).any():
+            return True
+        if np.array_equal(grown, reached):
+            return False
+        reached = grown
+
+# ? One random valid layout: a goalkeeper in front of the bars, defenders anywhere else, a bar stays reachable
+# ! start_state : the env's fixed start cell (CustomEnv starts at [4, 0]), it must lie on the grid and off the bars
+def randomLayout(rng, grid_size = 9, no_defenders = 5, start_state = (4, 0), max_attempts = 100):
+    goal_coordinates = goalCoordinates(grid_size)
+    middle = grid_size // 2
+    blocked = {(int(g[0]), int(g[1])) for g in goal_coordinates.values()}
+    if grid_size < 4 or not (0 <= start_state[0] < grid_size and 0 <= start_state[1] < grid_size) or tuple(start_state) in blocked:
+        raise ValueError(f"Start cell {tuple(start_state)} is not a free cell of a {grid_size}x{grid_size} layout "
+                         f"(the bars and the goalkeeper need grid_size >= 4, the default start [4, 0] grid_size >= 5).")
+    blocked |= {tuple(start_state)}
+
+    for _ in range(max_attempts):
+        # ! Goalkeeper: one of the cells two or three columns in front of the bars, drawn again if it hits the start
+        # ! (the bars are in the last column, so at most one of the six cells is blocked)
+        keeper = None
+        while keeper is None or keeper in blocked:
+            keeper = (int(rng.integers(middle - 1, middle + 2)), int(rng.integers(grid_size - 3, grid_size - 1)))
+        taken = blocked | {keeper}
+        free = np.array([cell for cell in range(grid_size * grid_size) if divmod(cell, grid_size) not in taken])
+        cells = rng.choice(free, size = min(no_defenders, len(free)), replace = False)
+
+        danger_coordinates = [{"coordinates": divmod(int(cell), grid_size), "role": "D"} for cell in cells]
+        danger_coordinates.append({"coordinates": keeper, "role": "GK"})
+
+        if isReachable(grid_size, goal_coordinates, danger_coordinates, start_state):
+            return {
+                'grid_size': grid_size,
+                'goal_coordinates': goal_coordinates,
+                'danger_coordinates': danger_coordinates,
+                'hash': layoutHash(grid_size, goal_coordinates, danger_coordinates)
+            }
+
+    raise ValueError(f"No reachable layout with {no_defenders} defenders on a {grid_size}x{grid_size} grid.")
+
+# ? Many distinct random layouts (duplicates are drawn again)
+# ! max_duplicates : duplicates in a row before giving up (small grids / few defenders have only so many layouts)
+def generate_layouts(no_layouts, grid_size = 9, no_defenders = 5, seed = 0, start_state = (4, 0), max_duplicates = 1_000):
+    rng = np.random.default_rng(seed)
+    layouts, seen = [], set()
+    duplicates = 0
+    while len(layouts) < no_layouts:
+        layout = randomLayout(rng, grid_size, no_defenders, start_state = start_state)
+        if layout['hash'] in seen:
+            duplicates += 1
+            if duplicates >= max_duplicates:
+                raise ValueError(f"Only {len(layouts)} distinct layouts found for a {grid_size}x{grid_size} grid with "
+                                 f"{no_defenders} defenders ({max_duplicates} duplicates in a row), {no_layouts} requested.")
+            continue
+        duplicates = 0
+        seen.add(layout['hash'])
+        layouts.append(layout)
+    return layouts
+
+def layoutModel(layout):
+    return GridModel.fromLayout(layout['grid_size'],
+                                goal_coordinates = list(layout['goal_coordinates'].values()),
+                                danger_coordinates = [danger['coordinates'] for danger in layout['danger_coordinates']])
+
+# ? Value iteration for a batch of same-size layouts at once (same rewards as plan_q_table)
+def planBatch(layouts, gamma, tolerance = 1e-6, max_iterations = 10_000):
+    models = [layoutModel(layout) for layout in layouts]
+    # ! Moves only depend on the grid size; the layouts differ in what happens at the target cell
+    reward, bootstrap, terminal_cells = planningArrays(np.stack([model.outcome for model in models]),
+                                                       np.stack([model.variable_point for model in models]),
+                                                       np.stack([model.cell_outcome for model in models]), gamma)
+    V, _, _ = valueIteration(reward, bootstrap, terminal_cells, models[0].next_state, tolerance, max_iterations)
+    return plannedQValues(reward, bootstrap, terminal_cells, models[0].next_state, V)
+
+# ? One job of run_layouts (runs inside a worker process) -> (start index, stacked flat Q-tables)
+def layoutJob(job):
+    start, layouts, method, settings = job
+
+    if method == "plan":
+        return start, planBatch(layouts, settings['gamma']).astype(np.float32)
+
+    from CustomEnv import createEnv
+    from QLearning import train_q_learning_batched
+
+    q_tables = []
+    for offset, layout in enumerate(layouts):
+        env = createEnv(goal_coordinates = layout['goal_coordinates'],
+                        danger_coordinates = layout['danger_coordinates'],
+                        random_initialization = settings['random_initialization'],
+                        sound = False,
+                        headless = True,
+                        grid_size = layout['grid_size'])
+        q_table, _ = train_q_learning_batched(env = env,
+                                              no_episodes = settings['no_episodes'],
+                                              epsilon = settings['epsilon'],
+                                              epsilon_min = settings['epsilon_min'],
+                                              epsilon_decay = settings['epsilon_decay'],
+                                              alpha = settings['alpha'],
+                                              gamma = settings['gamma'],
+                                              q_table_save_path = None,
+                                              seed = settings['seed'] + start + offset,
+                                              verbose = False)
+        q_tables.append(flatQValues(q_table))
+    return start, np.stack(q_tables).astype(np.float32)
+
+# ? Planning / training one Q-table per layout in parallel batches -> (layouts, grid, grid, actions) float32
+def run_layouts(layouts,
+                method = "plan",
+                batch_size = 64,
+                no_workers = None,
+                gamma = 0.99,
+                no_episodes = 1_000,
+                epsilon = 1.0,
+                epsilon_min = 0.1,
+                epsilon_decay = 0.995,
+                alpha = 0.1,
+                random_initialization = "uniform",
+                seed = 0):
+
+    if method not in ("plan", "train"):
+        raise ValueError(f"Unknown layout method '{method}'. Use 'plan' or 'train'.")
+    grid_size = layouts[0]['grid_size']
+    if any(layout['grid_size'] != grid_size for layout in layouts):
+        raise ValueError("All layouts of one run must have the same grid size.")
+
+    settings = {'gamma': gamma, 'no_episodes': no_episodes, 'epsilon': epsilon, 'epsilon_min': epsilon_min,
+                'epsilon_decay': epsilon_decay, 'alpha': alpha, 'random_initialization': random_initialization, 'seed': seed}
+    jobs = [(start, layouts[start:start + batch_size], method, settings) for start in range(0, len(layouts), batch_size)]
+
+    q_tables = np.zeros((len(layouts), grid_size * grid_size, 4), dtype = np.float32)
+    no_workers = no_workers or os.cpu_count() or 1
+    if no_workers == 1 or len(jobs) == 1:
+        results = map(layoutJob, jobs)
+        for start, batch in results:
+            q_tables[start:start + len(batch)] = batch
+    else:
+        with ProcessPoolExecutor(max_workers = no_workers) as pool:
+            for start, batch in pool.map(layoutJob, jobs):
+                q_tables[start:start + len(batch)] = batch
+
+    return q_tables.reshape(len(layouts), grid_size, grid_size, 4)
+
+# ? Greedy success rate over all start cells: every layout with its own Q-table, or one Q-table on every layout
+def evaluate_layouts(layouts, q_tables, max_steps = 200):
+    from Evaluation import evaluate_policy
+
+    q_tables = np.asarray(q_tables)
+    shared = q_tables.ndim == 3
+    return np.array([evaluate_policy(layoutModel(layout), q_table = q_tables if shared else q_tables[i], max_steps = max_steps)['success_rate']
+                     for i, layout in enumerate(layouts)])
+
+# ? Saving layouts + Q-tables as one archive, rows sorted by layout hash
+def save_layout_results(path, layouts, q_tables, success_rates = None):
+    order = np.argsort([layout['hash'] for layout in layouts])
+    no_dangers = max(len(layout['danger_coordinates']) for layout in layouts)
+
+    # ! Danger lists are padded with (-1, -1, "") to one fixed width
+    dangers = np.full((len(layouts), no_dangers, 2), -1, dtype = np.int32)
+    roles = np.full((len(layouts), no_dangers), "", dtype = "<U2")
+    goals = np.zeros((len(layouts), 3, 2), dtype = np.int32)
+    for row, index in enumerate(order):
+        layout = layouts[index]
+        goals[row] = [layout['goal_coordinates'][name] for name in ('Bar1', 'Bar2', 'Bar3')]
+        for column, danger in enumerate(layout['danger_coordinates']):
+            dangers[row, column] = danger['coordinates']
+            roles[row, column] = danger['role']
+
+    arrays = {
+        'hashes': np.array([layouts[index]['hash'] for index in order]),
+        'grid_size': layouts[0]['grid_size'],
+        'goals': goals,
+        'dangers': dangers,
+        'roles': roles,
+        'q_tables': np.asarray(q_tables)[order]
+    }
+    if success_rates is not None:
+        arrays['success_rates'] = np.asarray(success_rates)[order]
+
+    with open(path, "wb") as file:
+        np.savez(file, **arrays)
+
+class LayoutResults:
+    # ? Class Constructor (loads an archive written by save_layout_results)
+    def __init__(self, path) -> None:
+        with np.load(path) as data:
+            self.hashes = data['hashes']
+            self.grid_size = int(data['grid_size'])
+            self.goals = data['goals']
+            self.dangers = data['dangers']
+            self.roles = data['roles']
+            self.q_tables = data['q_tables']
+            self.success_rates = data['success_rates'] if 'success_rates' in data else None
+
+    def __len__(self):
+        return len(self.hashes)
+
+    # ? Row of a layout hash (binary search on the sorted hashes)
+    def index(self, layout_hash):
+        row = int(np.searchsorted(self.hashes, layout_hash))
+        if row == len(self.hashes) or self.hashes[row] != layout_hash:
+            raise KeyError(f"Unknown layout hash '{layout_hash}'")
+        return row
+
+    def qTable(self, layout_hash):
+        return self.q_tables[self.index(layout_hash)]
+
+    def layout(self, layout_hash):
+        row = self.index(layout_hash)
+        return {
+            'grid_size': self.grid_size,
+            'goal_coordinates': {name: self.goals[row, i] for i, name in enumerate(('Bar1', 'Bar2', 'Bar3'))},
+            'danger_coordinates': [{"coordinates": (int(r), int(c)), "role": str(role)}
+                                   for (r, c), role in zip(self.dangers[row], self.roles[row]) if role],
+            'hash': str(self.hashes[row])
+        }
@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+from GridModel import RUNNING, GOAL, DANGER
+
+class TrainingMetrics:
+    FIELDS = ['episode', 'reward', 'steps', 'epsilon', 'terminal', 'wall_time']
+    TERMINALS = {RUNNING: "none", GOAL: "goal", DANGER: "danger"}
+
+    # ? Class Constructor
+    def __init__(self, path = None, fmt = None, flush_every = 100, print_every = 100, window = 100, capacity = 1_000) -> None:
+        # ! path = None : keep the history in memory only. fmt : "csv", "jsonl" or "npz" (default: from the extension)
+        self.path = path
+        self.fmt = fmt or (os.path.splitext(path)[1].lstrip(".") if path else None)
+        if self.fmt not in (None, "csv", "jsonl", "npz"):
+            raise ValueError(f"Unknown metrics format '{self.fmt}'. Use 'csv', 'jsonl' or 'npz'.")
+        self.flush_every = flush_every
+        # ! print_every = 0 : silent. Otherwise one line of rolling aggregates every print_every episodes.
+        self.print_every = print_every
+        self.window = window
+
+        self.allocate(capacity)
+        self.count = 0
+        self.flushed = 0
+        self.header_written = False
+        # ! previous : rows of a resumed .npz history, kept ahead of this run's rows (see resume)
+        self.previous = None
+        self.start_time = time.perf_counter()
+
+    # ? Preallocated history arrays (doubled when full)
+    def allocate(self, capacity):
+        old = getattr(self, 'rewards', None)
+        self.capacity = capacity
+        arrays = {
+            'episodes': np.zeros(capacity, dtype = np.int64),
+            'rewards': np.zeros(capacity, dtype = np.float64),
+            'steps': np.zeros(capacity, dtype = np.int64),
+            'epsilons': np.zeros(capacity, dtype = np.float64),
+            'terminals': np.zeros(capacity, dtype = np.int8),
+            'wall_times': np.zeros(capacity, dtype = np.float64)
+        }
+        for name, array in arrays.items():
+            if old is not None:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+    # ? Recording one finished episode
+    def record(self, episode, reward, steps, epsilon, terminal):
+        if self.count == self.capacity:
+            self.allocate(self.capacity * 2)
+
+        i = self.count
+        self.episodes[i] = episode
+        self.rewards[i] = reward
+        self.steps[i] = steps
+        self.epsilons[i] = epsilon
+        self.terminals[i] = terminal
+        self.wall_times[i] = time.perf_counter() - self.start_time
+        self.count += 1
+
+        if self.print_every and self.count % self.print_every == 0:
+            self.printSummary()
+        if self.path is not None and self.count - self.flushed >= self.flush_every:
+            self.flush()
+
+    # ? Rolling aggregates over the last `window` episodes
+    def summary(self):
+        start = max(0, self.count - self.window)
+        terminals = self.terminals[start:self.count]
+        return {
+            'episode': int(self.episodes[self.count - 1]),
+            'mean_reward': float(self.rewards[start:self.count].mean()),
+            'mean_steps': float(self.steps[start:self.count].mean()),
+            'goal_rate': float((terminals == GOAL).mean()),
+            'danger_rate': float((terminals == DANGER).mean()),
+            'epsilon': float(self.epsilons[self.count - 1]),
+            'episodes_per_second': self.count / max(self.wall_times[self.count - 1], 1e-9)
+        }
+
+    def printSummary(self):
+        s = self.summary()
+        print(f"Episode {s['episode']}: Mean Reward: {s['mean_reward']:.2f}, Mean Steps: {s['mean_steps']:.1f}, "
+              f"Goal: {s['goal_rate']:.0%}, Danger: {s['danger_rate']:.0%}, Epsilon: {s['epsilon']:.3f}, "
+              f"Episodes/s: {s['episodes_per_second']:.0f}")
+
+    # ? Rows [start, end) as plain Python values
+    def rows(self, start, end):
+        return zip(self.episodes[start:end].tolist(),
+                   self.rewards[start:end].tolist(),
+                   self.steps[start:end].tolist(),
+                   self.epsilons[start:end].tolist(),
+                   [self.TERMINALS[t] for t in self.terminals[start:end].tolist()],
+                   self.wall_times[start:end].tolist())
+
+    # ? Continuing the file of an interrupted run (--resume from a checkpoint taken after `episode` episodes)
+    # ! Rows past `episode` were written after the checkpoint and get replayed, so they are dropped. CSV/JSONL then
+    # ! append to the kept rows without a second header, NPZ keeps them ahead of this run's history.
+    def resume(self, episode):
+        if self.path is None or not os.path.isfile(self.path):
+            return
+
+        if self.fmt == "npz":
+            with np.load(self.path) as data:
+                keep = data['episode'] <= episode
+                self.previous = {name: data[name][keep] for name in data.files}
+            return
+
+        with open(self.path, newline = "") as file:
+            lines = file.readlines()
+        header, body = (lines[:1], lines[1:]) if self.fmt == "csv" else ([], lines)
+        if self.fmt == "csv":
+            kept = [line for line in body if int(line.split(",", 1)[0]) <= episode]
+        else:
+            kept = [line for line in body if json.loads(line)['episode'] <= episode]
+        if len(kept) < len(body):
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", newline = "") as file:
+                file.writelines(header + kept)
+            os.replace(temp_path, self.path)
+        self.header_written = True
+
+    # ? Writing the pending batch (CSV/JSONL append, NPZ rewrites the whole history)
+    def flush(self):
+        if self.path is None or self.flushed == self.count:
+            return
+
+        if self.fmt == "npz":
+            temp_path = self.path + ".tmp"
+            history = self.history()
+            if self.previous is not None:
+                history = {name: np.concatenate([self.previous[name], values]) for name, values in history.items()}
+            with open(temp_path, "wb") as file:
+                np.savez(file, **history)
+            os.replace(temp_path, self.path)
+        else:
+            mode = "a" if self.header_written else "w"
+            with open(self.path, mode, newline = "") as file:
+                if self.fmt == "csv":
+                    writer = csv.writer(file)
+                    if not self.header_written:
+                        writer.writerow(self.FIELDS)
+                    writer.writerows(self.rows(self.flushed, self.count))
+                else:
+                    file.writelines(json.dumps(dict(zip(self.FIELDS, row))) + "\n" for row in self.rows(self.flushed, self.count))
+            self.header_written = True
+
+        self.flushed = self.count
+
+    # ? History as a dict of arrays (for plotting learning curves)
+    def history(self):
+        return {
+            'episode': self.episodes[:self.count],
+            'reward': self.rewards[:self.count],
+            'steps': self.steps[:self.count],
+            'epsilon': self.epsilons[:self.count],
+            'terminal': self.terminals[:self.count],
+            'wall_time': self.wall_times[:self.count]
+        }
+
+    def close(self):
+        self.flush()
@@ -0,0 +1,191 @@
+import collections
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import types
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class Profiler:
+    MODES = ("timers", "cprofile", "sampling")
+
+    # ? Class Constructor
+    def __init__(self, mode = "timers", output_path = None, sample_interval = 0.005, top = 20) -> None:
+        # ! mode : "timers" (per-phase timers only), "cprofile" (+ deterministic profile) or "sampling" (+ stack sampling)
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}'. Use 'timers', 'cprofile' or 'sampling'.")
+        self.mode = mode
+        # ! output_path : cProfile stats (.prof, for snakeviz / pstats) or the sampled counts (text)
+        self.output_path = output_path
+        self.sample_interval = sample_interval
+        self.top = top
+
+        self.totals = collections.defaultdict(float)
+        self.counts = collections.defaultdict(int)
+        self.wrapped = []
+        self.renderer = None
+        self.clock = None
+        self.audio = None
+        self.profile = None
+        self.samples = collections.Counter()
+        self.sampler = None
+        self.sampling = False
+        self.previous_handler = None
+        self.start_time = None
+        self.wall_time = 0.0
+
+    # ? Timed wrapper around one callable
+    def timed(self, name, function):
+        totals, counts, clock = self.totals, self.counts, time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                totals[name] += clock() - start
+                counts[name] += 1
+
+        return wrapper
+
+    # ? Shadowing a bound method with its timed version (an instance attribute, removed again by restore)
+    def wrap(self, obj, method, name = None):
+        if obj is None or not hasattr(obj, method) or method in vars(obj):
+            return
+        setattr(obj, method, self.timed(name or method, getattr(obj, method)))
+        self.wrapped.append((obj, method))
+
+    # ! Nothing is patched until instrument() is called: a run without a profiler executes the original methods.
+    # ? Instrumenting the env, the Q-table and the optional helpers of a run
+    def instrument(self, env = None, q_table = None, recorder = None, metrics = None):
+        if env is not None:
+            self.wrap(env, 'reset', "env.reset")
+            self.wrap(env, 'step', "env.step")
+            self.wrap(env, 'checkTermination', "env.checkTermination")
+            self.wrap(env, 'render', "env.render")
+            if getattr(env, 'display_ready', False) or getattr(env, 'audio_ready', False):
+                self.instrumentDisplay(env)
+            else:
+                # Display/audio are attached lazily, instrument them once they exist
+                attach = env.attachPygame
+                def attachPygame():
+                    attach()
+                    self.instrumentDisplay(env)
+                env.attachPygame = attachPygame
+                self.wrapped.append((env, 'attachPygame'))
+
+        self.wrap(q_table, 'greedyAction', "q.greedyAction")
+        self.wrap(q_table, 'maxValue', "q.maxValue")
+        self.wrap(q_table, 'update', "q.update")
+        self.wrap(recorder, 'addFrame', "recorder.addFrame")
+        self.wrap(metrics, 'record', "metrics.record")
+
+    def instrumentDisplay(self, env):
+        renderer = getattr(env, 'renderer', None)
+        if renderer is not None and self.renderer is None:
+            self.wrap(renderer, 'draw', "render.draw")
+            # ! Frame pacing wait (pygame's Clock can't take attributes, so it is proxied)
+            self.renderer, self.clock = renderer, renderer.clock
+            renderer.clock = types.SimpleNamespace(tick = self.timed("render.wait", self.clock.tick))
+        if getattr(env, 'audio', None) is not None:
+            self.audio = env.audio
+            self.wrap(env.audio, 'emit', "sound.emit")
+
+    # ? Removing every timed wrapper again
+    def restore(self):
+        for obj, method in reversed(self.wrapped):
+            if method in vars(obj):
+                delattr(obj, method)
+        self.wrapped = []
+        if self.renderer is not None:
+            self.renderer.clock = self.clock
+            self.renderer, self.clock = None, None
+
+    # ? Stack sampling
+    # ! Each sample is charged to the innermost project line (numpy / pygame internals count for their caller)
+    def recordSample(self, frame):
+        while frame is not None and not frame.f_code.co_filename.startswith(PROJECT_DIR):
+            frame = frame.f_back
+        if frame is not None and frame.f_code.co_filename != __file__:
+            code = frame.f_code
+            self.samples[f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"] += 1
+
+    # ! Preferred: SIGPROF timer (CPU time, main thread, Unix). Fallback: a thread peeking at the caller's stack,
+    # ! which is biased towards calls that release the GIL.
+    def signalSample(self, signum, frame):
+        self.recordSample(frame)
+
+    def samplerLoop(self, thread_id):
+        while self.sampling:
+            self.recordSample(sys._current_frames().get(thread_id))
+            time.sleep(self.sample_interval)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif self.mode == "sampling":
+            if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+                self.previous_handler = signal.signal(signal.SIGPROF, self.signalSample)
+                signal.setitimer(signal.ITIMER_PROF, self.sample_interval, self.sample_interval)
+            else:
+                self.sampling = True
+                self.sampler = threading.Thread(target = self.samplerLoop, args = (threading.get_ident(),), daemon = True)
+                self.sampler.start()
+
+    def stop(self):
+        if self.start_time is None:
+            return
+        self.wall_time += time.perf_counter() - self.start_time
+        self.start_time = None
+        if self.profile is not None:
+            self.profile.disable()
+        if self.previous_handler is not None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler)
+            self.previous_handler = None
+        if self.sampler is not None:
+            self.sampling = False
+            self.sampler.join()
+            self.sampler = None
+        self.restore()
+
+    # ? Phase table (+ profile / samples) at the end of a run
+    # ! Nested phases are included in their caller (env.step contains env.checkTermination, render.draw contains render.wait)
+    def summary(self):
+        lines = [f"{'Phase':24s} {'Calls':>10s} {'Total (s)':>10s} {'Per call (us)':>14s} {'Share':>7s}"]
+        for name, total in sorted(self.totals.items(), key = lambda item: -item[1]):
+            count = self.counts[name]
+            lines.append(f"{name:24s} {count:10d} {total:10.3f} {total / count * 1e6:14.2f} {total / max(self.wall_time, 1e-9):7.1%}")
+        lines.append(f"{'wall time':24s} {'':10s} {self.wall_time:10.3f}")
+
+        if self.audio is not None:
+            lines.append(f"Sound cues: played {self.audio.played}, coalesced {self.audio.coalesced}, "
+                         f"dropped {self.audio.dropped}, rate-limited {self.audio.rate_limited}")
+
+        if self.profile is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.profile, stream = stream).sort_stats("cumulative").print_stats(self.top)
+            lines.append(stream.getvalue())
+            if self.output_path is not None:
+                self.profile.dump_stats(self.output_path)
+
+        if self.samples:
+            no_samples = sum(self.samples.values())
+            sampled = [f"{count:8d} {count / no_samples:6.1%}  {where}" for where, count in self.samples.most_common(self.top)]
+            lines.append(f"Samples: {no_samples} (every {self.sample_interval * 1e3:.1f} ms of CPU time)")
+            lines.extend(sampled)
+            if self.output_path is not None:
+                with open(self.output_path, "w") as file:
+                    file.writelines(f"{count}\t{where}\n" for where, count in self.samples.most_common())
+
+        return "\n".join(lines)
+
+    def printSummary(self):
+        print(self.summary())
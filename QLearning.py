@@ -1,9 +1,21 @@
 import numpy as np
 import os
-import seaborn as sns
-import matplotlib.pyplot as plt
 
 from FileSystem import FileSystem
+from GridModel import RUNNING, GOAL, DANGER
+from QStorage import DenseQTable, createQTable, findQTable, loadQTable, saveQTable, gridQValues
+from Checkpoint import saveCheckpoint, loadCheckpoint
+from Metrics import TrainingMetrics
+from Dyna import DynaPlanner
+from EligibilityTraces import EligibilityTraces
+from VectorEnv import createVectorEnv
+
+
+# ? Epsilon-greedy action
+def epsilonGreedy(env, q_table, state, epsilon):
+    if np.random.rand() < epsilon:
+        return env.action_space.sample()  # Explore
+    return q_table.greedyAction(state)  # Exploit
 
 
 # ? Train Q-learning agent
@@ -14,53 +26,384 @@ def train_q_learning(env,
                      epsilon_decay,
                      alpha,
                      gamma,
-                     q_table_save_path = "q_table.npy",
+                     q_table_save_path = "q_table.qtb",
                      random_init = False,
-                     render = False):
+                     render = False,
+                     verbose = True,
+                     q_backend = "dense",
+                     recorder = None,
+                     checkpoint_path = None,
+                     checkpoint_interval = 0,
+                     resume = False,
+                     q_memmap_path = None,
+                     metrics = None,
+                     snapshot_every = 0,
+                     snapshot_path = "q_snapshots.npy",
+                     profiler = None,
+                     planning_steps = 0,
+                     prioritized_sweeping = False,
+                     early_stopping = None,
+                     q_dtype = "float64",
+                     trace_lambda = 0.0,
+                     trace_type = "accumulating",
+                     trace_algorithm = "q"):
+
+    grid_size = env.grid_size
+    start_episode = 0
+
+    # ! metrics (TrainingMetrics) : per-episode history, batched file output and rolling console summaries
+    if metrics is None:
+        metrics = TrainingMetrics(print_every = 100 if verbose else 0)
 
     # ? Initialize the Q-table:
-    if random_init:
-        q_table = np.random.rand(env.grid_size, env.grid_size, env.action_space.n)
+    # ! resume = True : continue from checkpoint_path (Q-table, epsilon, episode counter, RNG state)
+    if resume and checkpoint_path is not None and os.path.isfile(checkpoint_path):
+        q_table, epsilon, start_episode = loadCheckpoint(checkpoint_path, env)
+        metrics.resume(start_episode)
+        if verbose: print(f"Resumed from {checkpoint_path} at episode {start_episode}.")
     else:
-        q_table = np.zeros((env.grid_size, env.grid_size, env.action_space.n))
+        # ! q_backend = "dense" : (cells x actions) array. "hashed" : rows allocated only for visited cells.
+        # ! q_memmap_path : keep the dense table in a memory-mapped .npy instead of RAM
+        q_table = createQTable(q_backend, grid_size, env.action_space.n, random_init = random_init, memmap_path = q_memmap_path)
+
+    completed_episodes = start_episode
+
+    # ! snapshot_every > 0 : stack a float32 copy of the Q-table every snapshot_every episodes into one
+    # ! (snapshots, grid, grid, actions) .npy file, e.g. for Visualize.render_snapshots
+    snapshots = None
+    if snapshot_every:
+        shape = (no_episodes // snapshot_every, grid_size, grid_size, int(env.action_space.n))
+        if start_episode > 0 and os.path.isfile(snapshot_path):
+            snapshots = np.lib.format.open_memmap(snapshot_path, mode = "r+")
+            # ! A stack trimmed by an early stop is grown back to full size, keeping its rows
+            if len(snapshots) < shape[0]:
+                kept = np.array(snapshots)
+                snapshots = np.lib.format.open_memmap(snapshot_path, mode = "w+", dtype = np.float32, shape = shape)
+                snapshots[:len(kept)] = kept
+        else:
+            snapshots = np.lib.format.open_memmap(snapshot_path, mode = "w+", dtype = np.float32, shape = shape)
+
+    # ! planning_steps > 0 : Dyna-Q, simulated updates from a learned model after every real step
+    # ! (prioritized_sweeping = True : largest TD errors first). The model is not part of checkpoints.
+    planner = None
+    if planning_steps:
+        planner = DynaPlanner(grid_size * grid_size, int(env.action_space.n), planning_steps = planning_steps,
+                              gamma = gamma, alpha = alpha, prioritized = prioritized_sweeping)
+
+    # ! trace_lambda > 0 or trace_algorithm = "sarsa" : eligibility traces, every pair visited in the episode moves
+    # ! with each TD error. trace_algorithm "q" : Watkins's Q(lambda), "sarsa" : SARSA(lambda). trace_type :
+    # ! "accumulating" or "replacing". Needs the dense backend; traces are cleared every episode.
+    traces = None
+    if trace_lambda or trace_algorithm != "q":
+        if not isinstance(q_table, DenseQTable):
+            raise ValueError("Eligibility traces need the dense Q-table backend.")
+        traces = EligibilityTraces(grid_size * grid_size, int(env.action_space.n), trace_lambda = trace_lambda,
+                                   gamma = gamma, alpha = alpha, trace_type = trace_type, algorithm = trace_algorithm)
+
+    # ! profiler (Profiling.Profiler) : per-phase timers on env / Q-table / recorder / metrics for this run only
+    if profiler is not None:
+        profiler.instrument(env = env, q_table = q_table, recorder = recorder, metrics = metrics)
+        profiler.start()
 
     # ! Q-learning algorithm:
-    for episode in range(no_episodes):
-        state, _ = env.reset()
-        
-        state = tuple(map(int, state))
-        total_reward = 0
+    try:
+        for episode in range(start_episode, no_episodes):
+            state, _ = env.reset()
+            # ! recorder (EpisodeRecorder) : env must use render_mode = "rgb_array"
+            if recorder is not None:
+                recorder.addFrame(env.render())
 
-        while True:
-            if np.random.rand() < epsilon:
-                action = env.action_space.sample()  # Explore
-            else:
-                action = np.argmax(q_table[state])  # Exploit
+            total_reward = 0
+            step_count = 0
+            action = None
 
-            next_state, done, reward, _ = env.step(action)
-            if render:
-                env.render()
-                
-            next_state = tuple(map(int, next_state))
-            total_reward += reward
+            while True:
+                if action is None:
+                    action = epsilonGreedy(env, q_table, state, epsilon)
 
-            q_table[state][action] = q_table[state][action] + alpha * \
-                (reward + gamma *
-                 np.max(q_table[next_state]) - q_table[state][action])
-            state = next_state
+                next_state, done, reward, info = env.step(action)
+                if recorder is not None:
+                    recorder.addFrame(env.render())
+                elif render:
+                    env.render()
 
-            if done:
-                break
+                total_reward += reward
+                step_count += 1
+
+                if traces is None:
+                    q_table.update(state, action, reward + gamma * q_table.maxValue(next_state), alpha)
+                    next_action = None
+                else:
+                    # ! The next action is picked before the update: SARSA bootstraps on it, Watkins cuts on it
+                    next_action = None if done else epsilonGreedy(env, q_table, next_state, epsilon)
+                    traces.step(q_table.values, state, action, reward, next_state, next_action)
+                if planner is not None:
+                    planner.observe(q_table, state, action, reward, next_state)
+                state, action = next_state, next_action
+
+                if done:
+                    break
+
+
+            epsilon = max(epsilon_min, epsilon * epsilon_decay)
+            completed_episodes = episode + 1
 
+            if recorder is not None:
+                recorder.endEpisode(episode + 1, total_reward)
 
-        epsilon = max(epsilon_min, epsilon * epsilon_decay)
+            metrics.record(episode + 1, total_reward, step_count, epsilon, info["Outcome"])
 
-        print(f"Episode {episode + 1}: Total Reward: {total_reward:.2f}, Epsilon: {epsilon:.3f}, Mode: {'Exploit' if np.argmax(q_table[state]) == action else 'Explore'}")
+            if snapshots is not None and completed_episodes % snapshot_every == 0:
+                snapshots[completed_episodes // snapshot_every - 1] = q_table.toDense()
+
+            # ! Periodic checkpoint
+            if checkpoint_path is not None and checkpoint_interval and completed_episodes % checkpoint_interval == 0:
+                saveCheckpoint(checkpoint_path, q_table, epsilon, completed_episodes, env)
+
+            # ! early_stopping (EarlyStopping.EarlyStopping) : stop once the Q-table / policy / success rate settled
+            if early_stopping is not None and early_stopping.check(completed_episodes, q_table, metrics):
+                break
+
+    except (KeyboardInterrupt, SystemExit):
+        # ! Ctrl-C or closing the pygame window: keep what was learned so far
+        if checkpoint_path is not None:
+            saveCheckpoint(checkpoint_path, q_table, epsilon, completed_episodes, env)
+            print(f"Training interrupted. Checkpoint saved to {checkpoint_path} (episode {completed_episodes}).")
+        metrics.close()
+        if snapshots is not None:
+            snapshots.flush()
+        if profiler is not None:
+            profiler.stop()
+            profiler.printSummary()
+        raise
+
+    if profiler is not None:
+        profiler.stop()
+        profiler.printSummary()
+
+    if early_stopping is not None:
+        early_stopping.finish(completed_episodes)
+        if verbose: print(f"Stopped at episode {early_stopping.stopped_episode}, {early_stopping.reason}")
 
     env.close()
-    print("Training finished.\n")
-    np.save(q_table_save_path, q_table)
-    print("Saved the Q-table.")
+    metrics.close()
+    if snapshots is not None:
+        snapshots.flush()
+        # ! Stopped early: drop the rows that were never written, so the stack only holds real snapshots
+        no_filled = completed_episodes // snapshot_every
+        if no_filled < len(snapshots):
+            with open(snapshot_path + ".tmp", "wb") as file:
+                np.save(file, snapshots[:no_filled])
+            snapshots = None
+            os.replace(snapshot_path + ".tmp", snapshot_path)
+    if recorder is not None:
+        recorder.close()
+    if verbose: print("Training finished.\n")
+    # ! q_table_save_path = None : keep the table in memory only (e.g. sweep workers)
+    # ! A .qtb path stores the table as q_dtype with the layout, these settings and the final stats (see QTableFile)
+    if q_table_save_path is not None:
+        last = slice(max(0, metrics.count - 100), metrics.count)
+        method = f"{trace_algorithm}(lambda={trace_lambda}, {trace_type})" if traces is not None else "q-learning"
+        saveQTable(q_table, q_table_save_path, dtype = q_dtype, env = env,
+                   hyperparameters = {'method': ("dyna-" if planner is not None else "") + method, 'alpha': alpha,
+                                      'gamma': gamma, 'epsilon_min': epsilon_min, 'epsilon_decay': epsilon_decay,
+                                      'planning_steps': planning_steps, 'prioritized_sweeping': prioritized_sweeping,
+                                      'random_initialization': env.random_initialization},
+                   stats = {'episodes': completed_episodes, 'epsilon': epsilon,
+                            'mean_reward_last_100': float(metrics.rewards[last].mean()) if metrics.count else None,
+                            'success_rate_last_100': float((metrics.terminals[last] == GOAL).mean()) if metrics.count else None})
+        if verbose: print("Saved the Q-table.")
+
+    return q_table
+
+
+# ? Train Q-learning agents in lockstep on the compiled grid tables
+def train_q_learning_batched(env,
+                             no_episodes,
+                             epsilon,
+                             epsilon_min,
+                             epsilon_decay,
+                             alpha,
+                             gamma,
+                             no_envs = 32,
+                             max_steps = None,
+                             q_table_save_path = "q_table.qtb",
+                             random_init = False,
+                             seed = None,
+                             verbose = True,
+                             q_dtype = "float64"):
+
+    model = env.model if env.model is not None else env.compileModel()
+    rng = np.random.default_rng(seed)
+    n_actions = model.n_actions
+
+    # ? Initialize the flat (states x actions) Q-table:
+    if random_init:
+        q_table = rng.random((model.n_states, n_actions))
+    else:
+        q_table = np.zeros((model.n_states, n_actions))
+
+    # ! Episodes run in a VectorCustomEnv on the env's layout and compiled tables, one slot per running episode.
+    # ! Exploring starts follow the env's start distribution, drawn with the vector env's own generator.
+    no_envs = min(no_envs, no_episodes)
+    vector_env = createVectorEnv(goal_coordinates = env.goal,
+                                 danger_coordinates = env.danger_states,
+                                 no_envs = no_envs,
+                                 grid_size = model.grid_size,
+                                 autoreset = False,
+                                 seed = np.random.SeedSequence(seed).spawn(1)[0],
+                                 random_initialization = getattr(env, 'random_initialization', False),
+                                 start_weights = getattr(env, 'start_weights', None),
+                                 max_steps = max_steps,
+                                 model = model)
+    cells, _ = vector_env.reset()
+    total_rewards = np.zeros(no_envs)
+    episode_rewards = []
+    started = no_envs
+    finished = 0
+
+    # ! Batched Q-learning algorithm:
+    while finished < no_episodes:
+        n_running = len(cells)
+        greedy = q_table[cells].argmax(axis = 1)  # Exploit
+        explore = rng.random(n_running) < epsilon
+        actions = np.where(explore, rng.integers(0, n_actions, n_running), greedy)  # Explore
+
+        next_cells, done, rewards, _ = vector_env.step(actions)
+        total_rewards += rewards
+
+        # ! TD update for every running episode. A (cell, action) pair hit k times moves towards
+        # ! its mean TD error as k sequential updates would: step size 1 - (1 - alpha)^k.
+        td_error = rewards + gamma * q_table[next_cells].max(axis = 1) - q_table[cells, actions]
+        pairs, pair_idx = np.unique(cells * n_actions + actions, return_inverse = True)
+        pair_count = np.bincount(pair_idx)
+        td_mean = np.bincount(pair_idx, weights = td_error) / pair_count
+        q_table.reshape(-1)[pairs] += (1 - (1 - alpha) ** pair_count) * td_mean
+        cells = next_cells
+
+        no_done = int(done.sum())
+        if no_done == 0:
+            continue
+
+        done_idx = np.flatnonzero(done)
+        episode_rewards.extend(total_rewards[done_idx].tolist())
+        finished += no_done
+        epsilon = max(epsilon_min, epsilon * epsilon_decay ** no_done)
+
+        # ! Restart finished slots while episodes are left, retire the rest
+        no_restart = min(no_done, no_episodes - started)
+        restart = np.zeros(n_running, dtype = bool)
+        restart[done_idx[:no_restart]] = True
+        if no_restart:
+            cells, _ = vector_env.reset(restart)
+            total_rewards[restart] = 0
+            started += no_restart
+
+        if no_restart < no_done:
+            keep = ~done | restart
+            vector_env.retire(~keep)
+            cells, total_rewards = vector_env.states.copy(), total_rewards[keep]
+
+    episode_rewards = np.array(episode_rewards[:no_episodes])
+    if verbose: print(f"Training finished. Episodes: {no_episodes}, Mean Reward (last 100): {episode_rewards[-100:].mean():.2f}, Epsilon: {epsilon:.3f}\n")
+
+    # ! Same (grid, grid, actions) layout as train_q_learning
+    q_table = gridQValues(q_table, model.grid_size)
+    # ! q_table_save_path = None : keep the table in memory only (e.g. layout workers)
+    if q_table_save_path is not None:
+        saveQTable(DenseQTable(model.grid_size, n_actions, values = q_table), q_table_save_path, dtype = q_dtype, env = env,
+                   hyperparameters = {'method': "batched q-learning", 'alpha': alpha, 'gamma': gamma, 'epsilon_min': epsilon_min,
+                                      'epsilon_decay': epsilon_decay, 'no_envs': no_envs, 'max_steps': max_steps, 'seed': seed,
+                                      'random_initialization': getattr(env, 'random_initialization', False)},
+                   stats = {'episodes': no_episodes, 'epsilon': epsilon,
+                            'mean_reward_last_100': float(episode_rewards[-100:].mean())})
+        if verbose: print("Saved the Q-table.")
+
+    return q_table, episode_rewards
+
+
+# ? Plan the Q-table on the compiled grid tables (value / policy iteration)
+# ? Markov part of checkTermination -> (reward, bootstrap, terminal_cells)
+# ! +10 at the bars, -10 at a defender, position basis point otherwise. The step-count penalty and the running reward
+# ! carry depend on the path, not the cell, so they are left out. Takes one model's (cells x actions) outcome and
+# ! variable_point and (cells,) cell_outcome, or the same stacked over a leading batch axis (Layouts.planBatch).
+def planningArrays(outcome, variable_point, cell_outcome, gamma):
+    reward = np.where(outcome == GOAL, 10.0, np.where(outcome == DANGER, -10.0, variable_point))
+    bootstrap = gamma * (outcome == RUNNING)
+    return reward, bootstrap, cell_outcome != RUNNING
+
+# ? Value iteration over planningArrays (next_state : the shared (cells x actions) moves) -> (V, iterations, max delta)
+def valueIteration(reward, bootstrap, terminal_cells, next_state, tolerance = 1e-6, max_iterations = 10_000):
+    V = np.zeros(terminal_cells.shape)
+    for iteration in range(1, max_iterations + 1):
+        V_new = (reward + bootstrap * V[..., next_state]).max(axis = -1)
+        V_new[terminal_cells] = 0
+        delta = np.abs(V_new - V).max()
+        V = V_new
+        if delta < tolerance:
+            break
+    return V, iteration, delta
+
+# ? One-step lookahead on V -> Q-values (terminal cells are never acted from, kept at zero like an untrained table)
+def plannedQValues(reward, bootstrap, terminal_cells, next_state, V):
+    q_values = reward + bootstrap * V[..., next_state]
+    q_values[terminal_cells] = 0
+    return q_values
+
+def plan_q_table(env,
+                 gamma,
+                 method = "value",
+                 tolerance = 1e-6,
+                 max_iterations = 10_000,
+                 q_table_save_path = "q_table.qtb",
+                 q_dtype = "float64",
+                 verbose = True):
+
+    model = env.model if env.model is not None else env.compileModel()
+
+    reward, bootstrap, terminal_cells = planningArrays(model.outcome, model.variable_point, model.cell_outcome, gamma)
+    cell_idx = np.arange(model.n_states)
+
+    if method == "value":
+        V, iteration, delta = valueIteration(reward, bootstrap, terminal_cells, model.next_state, tolerance, max_iterations)
+
+    elif method == "policy":
+        V = np.zeros(model.n_states)
+        policy = np.zeros(model.n_states, dtype = np.int64)
+        for iteration in range(1, max_iterations + 1):
+            # ! Policy evaluation (iterative, stops at the same tolerance)
+            policy_next = model.next_state[cell_idx, policy]
+            policy_reward = reward[cell_idx, policy]
+            policy_bootstrap = bootstrap[cell_idx, policy]
+            for _ in range(max_iterations):
+                V_new = policy_reward + policy_bootstrap * V[policy_next]
+                V_new[terminal_cells] = 0
+                delta = np.abs(V_new - V).max()
+                V = V_new
+                if delta < tolerance:
+                    break
+
+            # ! Policy improvement
+            new_policy = (reward + bootstrap * V[model.next_state]).argmax(axis = 1)
+            if np.array_equal(new_policy, policy):
+                break
+            policy = new_policy
+
+    else:
+        raise ValueError(f"Unknown planning method '{method}'. Use 'value' or 'policy'.")
+
+    q_table = plannedQValues(reward, bootstrap, terminal_cells, model.next_state, V)
+
+    if verbose: print(f"Planning finished. Method: {method}, Iterations: {iteration}, Max Delta: {delta:.2e}\n")
+
+    # ! Same (grid, grid, actions) layout as train_q_learning
+    q_table = gridQValues(q_table, model.grid_size)
+    saveQTable(DenseQTable(model.grid_size, model.n_actions, values = q_table), q_table_save_path, dtype = q_dtype, env = env,
+               hyperparameters = {'method': f"{method} iteration", 'gamma': gamma, 'tolerance': tolerance},
+               stats = {'iterations': iteration, 'max_delta': float(delta)})
+    if verbose: print("Saved the Q-table.")
+
+    return q_table
 
 
 # ? Visualize the Q-table
@@ -78,7 +421,14 @@ def visualize_q_table(danger_coordinates=[
                         'Bar3': np.array([5, 8])
                     },
                     actions=["Up", "Down", "Right", "Left"],
-                    q_values_path="q_table.npy"):
+                    q_values_path="q_table.qtb",
+                    show=True,
+                    annotate_limit=15,
+                    output_dir="./Learning Data"):
+
+    # ! Plotting libraries are only loaded here (they cost ~1 s at import)
+    import seaborn as sns
+    import matplotlib.pyplot as plt
 
     tempDanger = [d['coordinates'] for d in danger_coordinates]
     danger_coordinates = tempDanger
@@ -86,7 +436,7 @@ def visualize_q_table(danger_coordinates=[
     goal_coordinates = [goal_coordinates["Bar1"], goal_coordinates["Bar2"], goal_coordinates["Bar3"]]
 
     try:
-        q_table = np.load(q_values_path)
+        q_table = loadQTable(findQTable(q_values_path) or q_values_path).toDense()
         _, axes = plt.subplots(1, 4, figsize = (20, 5))
 
         for i, action in enumerate(actions):
@@ -97,7 +447,8 @@ def visualize_q_table(danger_coordinates=[
             for coord in goal_coordinates + danger_coordinates:
                 mask[coord[0], coord[1]] = True
 
-            sns.heatmap(heatmap_data, annot = True, fmt=".2f", cmap = "viridis",
+            # ! Per-cell numbers are unreadable (and slow) on large grids
+            sns.heatmap(heatmap_data, annot = q_table.shape[0] <= annotate_limit, fmt=".2f", cmap = "viridis",
                         ax = ax, cbar = False, mask = mask, annot_kws = {"size": 9})
 
             for g in goal_coordinates:
@@ -109,46 +460,66 @@ def visualize_q_table(danger_coordinates=[
 
             ax.set_title(f'Action: {action}')
         # Saving Q-Table visual data  
-        FS = FileSystem()
+        FS = FileSystem(output_dir = output_dir)
         plt.tight_layout()
-        plt.savefig("./Learning Data/"+FS.getNewFileName(extension=".png")+".png")
-        plt.show()
+        plt.savefig(FS.getNewFilePath(extension=".png"))
+        # ! show = False : save only, never block (headless runs)
+        if show:
+            plt.show()
+        else:
+            plt.close()
 
     except FileNotFoundError:
         print("No saved Q-table was found. Please train the Q-learning agent first or check your path.")
 
 
 # ? Test with the Q-table
-def test_q_learning(env, q_table_path="q_table.npy", render=True):
-    # Load the trained Q-table
-    if os.path.isfile(q_table_path):
-        q_table = np.load(q_table_path)
+def test_q_learning(env, q_table_path="q_table.qtb", render=True, max_steps=200, profiler=None, verbose=True):
+    # Load the trained Q-table (a .qtb table is checked against the env's grid and layout first)
+    q_table_path = findQTable(q_table_path)
+    if q_table_path is not None:
+        q_table = loadQTable(q_table_path, env = env)
     else:
-        q_table = []
+        q_table = None
 
-    if(q_table is not None and len(q_table)>0):
+    if q_table is not None:
+        grid_size = env.grid_size
         state, info = env.reset()
-        state = tuple(map(int, state))
 
         total_reward = 0
         step_count = 0
+        # ! Greedy policy + deterministic grid: revisiting a cell means the agent is stuck in a cycle
+        visited = {state}
+
+        if profiler is not None:
+            profiler.instrument(env = env, q_table = q_table)
+            profiler.start()
 
         while True:
-            action = np.argmax(q_table[state])  # ! Exploit only (no exploration)
+            action = q_table.greedyAction(state)  # ! Exploit only (no exploration)
             next_state, done, reward, info = env.step(action)
             if render:
                 env.render()
 
-            next_state = tuple(map(int, next_state))
             total_reward += reward
             step_count += 1
             state = next_state
 
             if done:
                 break
+            if state in visited:
+                if verbose: print(f"Greedy policy is looping (cell {divmod(state, grid_size)} revisited).")
+                break
+            if max_steps is not None and step_count >= max_steps:
+                if verbose: print(f"Step limit reached ({max_steps}).")
+                break
+            visited.add(state)
 
+        if profiler is not None:
+            profiler.stop()
+            profiler.printSummary()
         env.close()
-        print(f"Test completed. Total Reward: {total_reward:.2f}, Steps Taken: {step_count}")
+        if verbose: print(f"Test completed. Total Reward: {total_reward:.2f}, Steps Taken: {step_count}")
         
     else:
         print("Train the environment first.")
@@ -0,0 +1,239 @@
+import os
+
+import numpy as np
+
+from QTableFile import EXTENSION, isQTableFile, readQTable, writeQTable, layoutFingerprint
+
+# ? Dense backend: one contiguous (cells x actions) array
+class DenseQTable:
+    # ? Class Constructor
+    def __init__(self, grid_size, n_actions, random_init = False, dtype = np.float64, values = None, rng = None,
+                 memmap_path = None, memmap_mode = "w+") -> None:
+        self.grid_size = grid_size
+        self.n_actions = n_actions
+        # ! memmap_path : the table lives in a (grid, grid, actions) .npy file on disk, saving is a flush
+        self.memmap_path = memmap_path
+        # ! header : metadata of a table loaded from a .qtb file (see QTableFile), None otherwise
+        self.header = None
+
+        if memmap_path is not None:
+            shape = (int(grid_size), int(grid_size), int(n_actions))
+            if memmap_mode == "w+":
+                self.memmap = np.lib.format.open_memmap(memmap_path, mode = "w+", dtype = dtype, shape = shape)
+                if random_init:
+                    self.memmap[:] = (rng or np.random).random(shape)
+            else:
+                self.memmap = np.lib.format.open_memmap(memmap_path, mode = memmap_mode)
+            self.values = self.memmap.reshape(grid_size * grid_size, n_actions)
+        elif values is not None:
+            self.values = values.reshape(grid_size * grid_size, n_actions)
+        elif random_init:
+            self.values = (rng or np.random).random((grid_size * grid_size, n_actions)).astype(dtype)
+        else:
+            self.values = np.zeros((grid_size * grid_size, n_actions), dtype = dtype)
+
+    # ? Reading
+    def greedyAction(self, cell):
+        return int(np.argmax(self.values[cell]))
+
+    def maxValue(self, cell):
+        return self.values[cell].max()
+
+    def rowValues(self, cell):
+        return self.values[cell]
+
+    # ? Writing: Q(s, a) <- Q(s, a) + alpha * (target - Q(s, a))
+    def update(self, cell, action, target, alpha):
+        self.values[cell, action] += alpha * (target - self.values[cell, action])
+
+    # ? (grid, grid, actions) view, the q_table.npy layout
+    def toDense(self):
+        return self.values.reshape(self.grid_size, self.grid_size, self.n_actions)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def flush(self):
+        if self.memmap_path is not None:
+            self.memmap.flush()
+
+    def save(self, path):
+        if self.memmap_path is not None and os.path.abspath(path) == os.path.abspath(self.memmap_path):
+            self.flush()
+        else:
+            np.save(path, self.toDense())
+
+
+# ? Sparse backend: open-addressing hash (linear probing), rows allocated on first write
+class HashedQTable:
+    EMPTY = -1
+
+    # ? Class Constructor
+    def __init__(self, grid_size, n_actions, random_init = False, dtype = np.float32, capacity = 1024, rng = None) -> None:
+        self.grid_size = grid_size
+        self.n_actions = n_actions
+        self.random_init = random_init
+        self.dtype = dtype
+        self.rng = rng or np.random
+        # ! header : metadata of a table loaded from a .qtb file (see QTableFile), None otherwise
+        self.header = None
+
+        # ! Capacity stays a power of two so the probe start is a bit mask
+        capacity = 1 << max(4, int(capacity - 1).bit_length())
+        self.allocate(capacity)
+        self.size = 0
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.shift = 64 - (capacity.bit_length() - 1)
+        self.keys = np.full(capacity, self.EMPTY, dtype = np.int64)
+        self.values = np.zeros((capacity, self.n_actions), dtype = self.dtype)
+
+    # ? Slot of a cell; -1 if the cell was never written and insert is False
+    def slot(self, cell, insert = False):
+        cell = int(cell)
+        keys = self.keys
+        # Fibonacci hashing spreads neighbouring cells across the table
+        index = ((cell * 11400714819323198485) & 0xFFFFFFFFFFFFFFFF) >> self.shift
+        while True:
+            key = keys[index]
+            if key == cell:
+                return index
+            if key == self.EMPTY:
+                break
+            index = (index + 1) & self.mask
+
+        if not insert:
+            return -1
+
+        # ! Keep the load factor under 1/2 so probe chains stay short
+        if (self.size + 1) * 2 > self.capacity:
+            self.grow()
+            return self.slot(cell, insert = True)
+
+        keys[index] = cell
+        if self.random_init:
+            self.values[index] = self.rng.random(self.n_actions)
+        self.size += 1
+        return index
+
+    def grow(self):
+        old_keys, old_values = self.keys, self.values
+        self.allocate(self.capacity * 2)
+        self.size = 0
+        random_init, self.random_init = self.random_init, False
+        for index in np.flatnonzero(old_keys != self.EMPTY):
+            self.values[self.slot(old_keys[index], insert = True)] = old_values[index]
+        self.random_init = random_init
+
+    # ? Reading (never allocates; unvisited cells read as zeros)
+    def rowValues(self, cell):
+        index = self.slot(cell)
+        return self.values[index] if index >= 0 else np.zeros(self.n_actions, dtype = self.dtype)
+
+    def greedyAction(self, cell):
+        return int(np.argmax(self.rowValues(cell)))
+
+    def maxValue(self, cell):
+        return self.rowValues(cell).max()
+
+    # ? Writing: Q(s, a) <- Q(s, a) + alpha * (target - Q(s, a))
+    def update(self, cell, action, target, alpha):
+        index = self.slot(cell, insert = True)
+        self.values[index, action] += alpha * (target - self.values[index, action])
+
+    # ? Visited cells and their rows
+    def items(self):
+        occupied = np.flatnonzero(self.keys != self.EMPTY)
+        return self.keys[occupied], self.values[occupied]
+
+    # ? (grid, grid, actions) array, the q_table.npy layout
+    def toDense(self):
+        dense = np.zeros((self.grid_size * self.grid_size, self.n_actions), dtype = self.dtype)
+        cells, rows = self.items()
+        dense[cells] = rows
+        return dense.reshape(self.grid_size, self.grid_size, self.n_actions)
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.values.nbytes
+
+    def save(self, path):
+        cells, rows = self.items()
+        with open(path, "wb") as file:
+            np.savez(file, grid_size = self.grid_size, n_actions = self.n_actions, cells = cells, values = rows)
+
+    @classmethod
+    def fromItems(cls, grid_size, n_actions, cells, rows):
+        q_table = cls(grid_size, n_actions, dtype = rows.dtype, capacity = 2 * len(cells) + 1)
+        for cell, row in zip(cells, rows):
+            q_table.values[q_table.slot(cell, insert = True)] = row
+        return q_table
+
+
+# ? q_table.npy layout (grid, grid, actions) <-> flat (cells, actions), cell = row * grid_size + col
+def flatQValues(q_values):
+    q_values = np.asarray(q_values)
+    return np.ascontiguousarray(q_values.reshape(-1, q_values.shape[-1]))
+
+def gridQValues(q_values, grid_size):
+    q_values = np.asarray(q_values)
+    return q_values.reshape(grid_size, grid_size, q_values.shape[-1])
+
+# ? Backend factory
+def createQTable(backend, grid_size, n_actions, random_init = False, rng = None, memmap_path = None):
+    if backend == "dense":
+        return DenseQTable(grid_size, n_actions, random_init = random_init, rng = rng, memmap_path = memmap_path)
+    if backend == "hashed":
+        return HashedQTable(grid_size, n_actions, random_init = random_init, rng = rng)
+    raise ValueError(f"Unknown Q-table backend '{backend}'. Use 'dense' or 'hashed'.")
+
+# ? Saving by extension: .qtb -> self-describing Q-table file, anything else -> the backend's own save
+# ! dtype : "float64", "float32" or "float16" (.qtb only). env : stores its layout fingerprint for loadQTable.
+# ! A HashedQTable keeps its sparse form in the file (visited cells + rows), size stays O(visited cells).
+def saveQTable(q_table, path, dtype = "float64", env = None, hyperparameters = None, stats = None):
+    if not path.endswith(EXTENSION):
+        q_table.save(path)
+        return
+    settings = {'dtype': dtype, 'layout': layoutFingerprint(env) if env is not None else None,
+                'hyperparameters': hyperparameters, 'stats': stats}
+    if isinstance(q_table, HashedQTable):
+        cells, rows = q_table.items()
+        writeQTable(path, rows, cells = cells, grid_size = q_table.grid_size, **settings)
+    else:
+        writeQTable(path, q_table.toDense(), **settings)
+
+# ? Path to load -> None if there is no table
+# ! A missing .qtb falls back to the bare .npy next to it (e.g. the shipped q_table.npy), which can't be validated
+def findQTable(path):
+    if os.path.isfile(path):
+        return path
+    if path.endswith(EXTENSION):
+        legacy = path[:-len(EXTENSION)] + ".npy"
+        if os.path.isfile(legacy):
+            print(f"Warning: {path} not found, using {legacy} (a bare array: its grid and layout are not checked).")
+            return legacy
+    return None
+
+# ? Loading a .qtb file, a dense q_table.npy or a hashed .npz archive
+# ! env : a .qtb table must match its grid size, actions and layout (header only, raises ValueError otherwise).
+# ! mmap : map a dense .qtb payload read-only instead of loading it. Sparse .qtb files load back as a HashedQTable.
+def loadQTable(path, env = None, mmap = False):
+    if isQTableFile(path):
+        values, header = readQTable(path, env = env, mmap = mmap)
+        grid_size, _, n_actions = header['shape']
+        if header.get('storage', "dense") == "sparse":
+            q_table = HashedQTable.fromItems(grid_size, n_actions, *values)
+        else:
+            q_table = DenseQTable(grid_size, n_actions, values = values)
+        q_table.header = header
+        return q_table
+
+    data = np.load(path)
+    if isinstance(data, np.ndarray):
+        return DenseQTable(data.shape[0], data.shape[2], values = data)
+
+    with data:
+        return HashedQTable.fromItems(int(data['grid_size']), int(data['n_actions']), data['cells'], data['values'])
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+# ? File layout (little endian):
+# !  magic (8 bytes) | header length (uint32) | JSON header, space padded | payload
+# ! The header holds everything needed to validate and map the table: version, dtype, shape, storage, payload
+# ! offset, layout fingerprint, hyperparameters, training stats and the payload checksum. The payload starts on a
+# ! 64-byte boundary, so it can be memory-mapped:
+# !  storage "dense"  : the raw C-order (grid, grid, actions) array
+# !  storage "sparse" : the visited cells (int64, `no_cells` of them), then their (no_cells, actions) rows
+# ! Version 1 files have no storage entry and are dense.
+MAGIC = b"QTABLE\x00\x00"
+VERSION = 2
+EXTENSION = ".qtb"
+DTYPES = ("float64", "float32", "float16")
+ALIGNMENT = 64
+PREFIX = struct.Struct("<8sI")
+
+# ? Layout fingerprint of an env (grid size, bars, defenders and their stable hash)
+def layoutFingerprint(env):
+    from Layouts import layoutHash
+
+    return {
+        'grid_size': int(env.grid_size),
+        'goals': sorted([int(goal_coord[0]), int(goal_coord[1])] for goal_coord in env.goal.values()),
+        'dangers': sorted([int(danger['coordinates'][0]), int(danger['coordinates'][1]), danger['role']]
+                          for danger in env.danger_states),
+        'hash': layoutHash(env.grid_size, env.goal, env.danger_states)
+    }
+
+def payloadChecksum(payload):
+    return hashlib.blake2b(payload, digest_size = 16).hexdigest()
+
+def isQTableFile(path):
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+# ? Writing a table (temp file, then renamed over the old one)
+# ! cells = None : q_values is the (grid, grid, actions) table. Otherwise q_values are the (cells, actions) rows of
+# ! the given cells only (sparse storage, e.g. a HashedQTable), and grid_size is required.
+def writeQTable(path, q_values, dtype = "float64", layout = None, hyperparameters = None, stats = None,
+                cells = None, grid_size = None):
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown Q-table dtype '{dtype}'. Use 'float64', 'float32' or 'float16'.")
+    q_values = np.asarray(q_values)
+    if cells is None and q_values.ndim != 3:
+        raise ValueError(f"Expected a (grid, grid, actions) Q-table, got shape {q_values.shape}.")
+    if cells is not None and (q_values.ndim != 2 or len(q_values) != len(cells) or grid_size is None):
+        raise ValueError(f"Sparse Q-tables need one (actions,) row per cell and the grid size, got rows {q_values.shape}.")
+
+    # ! float16 tops out at 65504 and keeps ~3 significant digits
+    limit = np.finfo(dtype).max
+    if np.abs(q_values).max(initial = 0) > limit:
+        raise ValueError(f"Q-values exceed the {dtype} range (|Q| > {limit:g}). Save as float32 or float64.")
+    payload = np.ascontiguousarray(q_values, dtype = np.dtype(dtype).newbyteorder("<")).tobytes()
+    if cells is None:
+        shape = [int(size) for size in q_values.shape]
+    else:
+        shape = [int(grid_size), int(grid_size), int(q_values.shape[1])]
+        payload = np.ascontiguousarray(cells, dtype = "<i8").tobytes() + payload
+
+    header = {
+        'version': VERSION,
+        'dtype': np.dtype(dtype).newbyteorder("<").str,
+        'shape': shape,
+        'storage': "dense" if cells is None else "sparse",
+        'no_cells': None if cells is None else len(cells),
+        'payload_offset': 0,
+        'payload_bytes': len(payload),
+        'checksum': {'algorithm': "blake2b-128", 'digest': payloadChecksum(payload)},
+        'layout': layout,
+        'hyperparameters': hyperparameters or {},
+        'stats': stats or {}
+    }
+    # ! The offset is stored in the header itself: size the header with a wide placeholder, then pad it to the boundary
+    header['payload_offset'] = 10 ** 9
+    encoded = json.dumps(header, default = float).encode()
+    offset = -(-(PREFIX.size + len(encoded)) // ALIGNMENT) * ALIGNMENT
+    header['payload_offset'] = offset
+    encoded = json.dumps(header, default = float).encode().ljust(offset - PREFIX.size, b" ")
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(PREFIX.pack(MAGIC, len(encoded)))
+        file.write(encoded)
+        file.write(payload)
+    os.replace(temp_path, path)
+
+# ? Header only (prefix + JSON, the payload is not read)
+def readHeader(path):
+    with open(path, "rb") as file:
+        magic, length = PREFIX.unpack(file.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Q-table file.")
+        header = json.loads(file.read(length))
+    if header['version'] > VERSION:
+        raise ValueError(f"{path} has Q-table format version {header['version']}, this code reads up to {VERSION}.")
+    return header
+
+# ? Does the table fit the env? Compares the stored fingerprint only -> raises ValueError on a mismatch
+def validateHeader(header, env):
+    grid_size, _, n_actions = header['shape']
+    if grid_size != env.grid_size or n_actions != env.action_space.n:
+        raise ValueError(f"Q-table is for a {grid_size}x{grid_size} grid with {n_actions} actions, "
+                         f"the env is {env.grid_size}x{env.grid_size} with {env.action_space.n}.")
+
+    layout = header['layout']
+    if layout is None:
+        return
+    current = layoutFingerprint(env)
+    if layout['hash'] != current['hash']:
+        differences = [name for name in ('goals', 'dangers') if layout[name] != current[name]]
+        raise ValueError(f"Q-table was trained on a different layout (different {' and '.join(differences) or 'fields'}: "
+                         f"{layout['hash']} vs {current['hash']}).")
+
+# ? Reading -> (q_values, header); q_values is the (grid, grid, actions) array, or (cells, rows) for sparse storage
+# ! mmap = True : read-only memory map, the payload is only paged in when used. verify : check the checksum
+# ! (default: only when the payload is read anyway, i.e. without mmap).
+def readQTable(path, env = None, mmap = False, verify = None):
+    header = readHeader(path)
+    if env is not None:
+        validateHeader(header, env)
+
+    dtype, offset = np.dtype(header['dtype']), header['payload_offset']
+    sparse = header.get('storage', "dense") == "sparse"
+    if sparse:
+        no_cells = header['no_cells']
+        shapes = [((no_cells,), np.dtype("<i8")), ((no_cells, header['shape'][2]), dtype)]
+    else:
+        shapes = [(tuple(header['shape']), dtype)]
+
+    arrays = []
+    with open(path, "rb") as file:
+        file.seek(offset)
+        for shape, array_dtype in shapes:
+            size = int(np.prod(shape)) * array_dtype.itemsize
+            if mmap:
+                arrays.append(np.memmap(path, dtype = array_dtype, mode = "r", offset = offset, shape = shape))
+            else:
+                arrays.append(np.frombuffer(file.read(size), dtype = array_dtype).reshape(shape).copy())
+            offset += size
+
+    if verify is None:
+        verify = not mmap
+    if verify and payloadChecksum(b"".join(np.ascontiguousarray(array).tobytes() for array in arrays)) != header['checksum']['digest']:
+        raise ValueError(f"{path} is corrupted (payload checksum mismatch).")
+
+    return (tuple(arrays) if sparse else arrays[0]), header
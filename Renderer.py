@@ -0,0 +1,92 @@
+import pygame
+
+class FieldRenderer:
+    # ? Class Constructor
+    def __init__(self, screen, grid_size, cell_size, danger_states, fps = 10) -> None:
+        self.screen = screen
+        self.grid_size = grid_size
+        self.danger_states = danger_states
+        # ! fps = None / 0 : unthrottled. Otherwise frames are paced to at most fps per second.
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+
+        self.imageLoader()
+        self.setCellSize(cell_size)
+
+    # ? Loading one sprite (convert_alpha needs a window; offscreen surfaces keep the raw image)
+    def loadImage(self, path):
+        image = pygame.image.load(path)
+        return image.convert_alpha() if pygame.display.get_surface() is not None else image
+
+    # ? Loading the sprites from disk (once)
+    def imageLoader(self):
+        self.field_image = self.loadImage("./resources/img/FIELD.png")
+        #? Source: https://www.freepik.com/free-vector/soccer-field-background-with-scoreboard_2077950.htm?
+        #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)
+        #! Modification: Cropped
+        self.defender_image = self.loadImage("./resources/img/DEFENDER.png")
+        #? Source: https://www.freepik.com/icon/soccer-player_3948791
+        #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)
+        #! Modification: None
+        self.goalkeeper_image = self.loadImage("./resources/img/GOALKEEPER.png")
+        #? Source: https://www.freepik.com/icon/goalkeeper_3564495
+        #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)
+        #! Modification: None
+        self.agent_image = self.loadImage("./resources/img/PLAYER.png")
+        #? Source: https://www.freepik.com/icon/football_1099672
+        #! License: Free (https://www.freepik.com/legal/terms-of-use#nav-freepik-license)
+        #! Modification: None
+
+    # ? Pre-scaling every sprite for the cell size (sprite atlas)
+    def setCellSize(self, cell_size):
+        self.cell_size = cell_size
+        field_size = (cell_size * self.grid_size, cell_size * self.grid_size)
+        self.sprites = {
+            'FIELD': pygame.transform.scale(self.field_image, field_size),
+            'D': pygame.transform.scale(self.defender_image, (cell_size, cell_size)),
+            'GK': pygame.transform.scale(self.goalkeeper_image, (cell_size, cell_size)),
+            'AGENT': pygame.transform.scale(self.agent_image, (cell_size, cell_size))
+        }
+        self.invalidate()
+
+    # ? Static layer: field + defenders, drawn once per layout
+    def invalidate(self):
+        self.background = pygame.Surface(self.sprites['FIELD'].get_size())
+        # Background Color:
+        self.background.fill((11, 74, 1))
+        # Field Grass
+        self.background.blit(self.sprites['FIELD'], (0, 0))
+        # Opponent & GK:
+        for each_danger in self.danger_states:
+            sprite = self.sprites['GK'] if each_danger['role'] == "GK" else self.sprites['D']
+            self.background.blit(sprite, (each_danger['coordinates'][1] * self.cell_size, each_danger['coordinates'][0] * self.cell_size))
+
+        self.agent_rect = None
+        self.full_redraw = True
+
+    # ? Drawing one frame; only the old and new agent cells are redrawn
+    def draw(self, state, present = True):
+        new_rect = pygame.Rect(state[1] * self.cell_size, state[0] * self.cell_size, self.cell_size, self.cell_size)
+
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+            dirty = None
+            self.full_redraw = False
+        else:
+            # Restoring the static layer under the agent's previous cell
+            self.screen.blit(self.background, self.agent_rect, self.agent_rect)
+            dirty = [self.agent_rect, new_rect]
+
+        # Agent:
+        self.screen.blit(self.sprites['AGENT'], new_rect)
+        self.agent_rect = new_rect
+
+        if present:
+            if dirty is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
+
+        # ! Frame pacing (replaces the fixed 100 ms wait)
+        if self.fps:
+            self.clock.tick(self.fps)
@@ -0,0 +1,53 @@
+import numpy as np
+
+from GridModel import RUNNING
+
+class StartSampler:
+    MODES = ("uniform", "weighted", "visits")
+
+    # ? Class Constructor
+    def __init__(self, cell_outcome, mode = "uniform", weights = None) -> None:
+        # ! mode : "uniform" over safe cells, "weighted" by `weights` (one per cell), "visits" favours rarely visited cells
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown start distribution '{mode}'. Use 'uniform', 'weighted' or 'visits'.")
+        self.mode = mode
+
+        # ! Valid starts (no goal, no danger), computed once per layout
+        self.start_cells = np.flatnonzero(np.asarray(cell_outcome) == RUNNING)
+        self.visits = np.zeros(len(cell_outcome), dtype = np.int64)
+
+        self.cdf = None
+        if mode == "weighted":
+            if weights is None:
+                raise ValueError("start distribution 'weighted' needs start weights (one per cell).")
+            weights = np.asarray(weights, dtype = np.float64).reshape(-1)[self.start_cells]
+            if weights.sum() <= 0:
+                raise ValueError("start weights are zero on every safe cell.")
+            # Cumulative weights: a sample is one binary search
+            self.cdf = np.cumsum(weights) / weights.sum()
+
+    # ? Building the sampler from a static layout (no compiled model needed)
+    @classmethod
+    def fromLayout(cls, grid_size, goal_coordinates, danger_coordinates, mode = "uniform", weights = None):
+        cell_outcome = np.zeros(grid_size * grid_size, dtype = np.int8)
+        for coord in list(goal_coordinates) + list(danger_coordinates):
+            cell_outcome[int(coord[0]) * grid_size + int(coord[1])] = RUNNING + 1
+        return cls(cell_outcome, mode = mode, weights = weights)
+
+    # ? Drawing start cells (flat indices) with the caller's generator
+    def sample(self, rng, size = None):
+        if self.mode == "uniform":
+            return self.start_cells[rng.integers(len(self.start_cells), size = size)]
+        if self.mode == "weighted":
+            return self.start_cells[np.searchsorted(self.cdf, rng.random(size), side = "right").clip(max = len(self.cdf) - 1)]
+
+        # ! "visits" : probability ~ 1 / (1 + visits), recomputed from the current counts
+        weights = 1.0 / (1.0 + self.visits[self.start_cells])
+        return self.start_cells[rng.choice(len(self.start_cells), size = size, p = weights / weights.sum())]
+
+    # ? Counting visited cells (only the "visits" distribution needs them)
+    def recordVisit(self, cell):
+        self.visits[cell] += 1
+
+    def recordVisits(self, cells):
+        self.visits += np.bincount(cells, minlength = len(self.visits))
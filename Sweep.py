@@ -0,0 +1,130 @@
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from CustomEnv import createEnv
+from Evaluation import evaluate_policy
+from QLearning import train_q_learning
+from QStorage import saveQTable
+
+# ? Grid search: every combination of the listed values
+def gridConfigs(search_space):
+    keys = list(search_space.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*[search_space[key] for key in keys])]
+
+# ? Random search: lists are sampled as choices, (low, high) tuples uniformly
+def randomConfigs(search_space, no_samples, rng):
+    configs = []
+    for _ in range(no_samples):
+        config = {}
+        for key, space in search_space.items():
+            if isinstance(space, tuple):
+                value = rng.uniform(space[0], space[1])
+                config[key] = int(round(value)) if isinstance(space[0], int) and isinstance(space[1], int) else float(value)
+            else:
+                config[key] = space[rng.integers(len(space))]
+        configs.append(config)
+    return configs
+
+# ? One sweep job (runs inside a worker process)
+def runConfig(job):
+    index, config, seed, goal_coordinates, danger_coordinates, env_settings, max_eval_steps = job
+
+    # ! Per-job seeding: train_q_learning uses np.random, exploration uses the action space RNG,
+    # ! exploring starts the env's generator
+    np.random.seed(seed)
+    env = createEnv(goal_coordinates = goal_coordinates,
+                    danger_coordinates = danger_coordinates,
+                    sound = False,
+                    headless = True,
+                    **env_settings)
+    env.action_space.seed(seed)
+    env.reset(seed = seed)
+
+    q_table = train_q_learning(env = env,
+                               q_table_save_path = None,
+                               render = False,
+                               verbose = False,
+                               **config)
+
+    # ! Greedy rollouts from every start cell; success/eval_reward/eval_steps are the ones from the reset state
+    result = evaluate_policy(env.model, q_table = q_table, max_steps = max_eval_steps)
+    start = int(np.flatnonzero(result['start_cells'] == env.model.start_state)[0])
+
+    return index, {**config,
+                   'seed': seed,
+                   'success': bool(result['success'][start]),
+                   'eval_reward': float(result['returns'][start]),
+                   'eval_steps': int(result['steps'][start]),
+                   'success_rate': result['success_rate'],
+                   'loop_rate': result['loop_rate'],
+                   'mean_eval_steps': result['mean_steps']}, q_table
+
+# ? Parallel hyperparameter sweep over train_q_learning
+def run_sweep(search_space,
+              goal_coordinates,
+              danger_coordinates,
+              base_config,
+              env_settings = None,
+              mode = "grid",
+              no_samples = 20,
+              no_workers = None,
+              seed = 0,
+              max_eval_steps = 200,
+              results_path = "sweep_results.csv",
+              best_q_table_path = "q_table_best.qtb"):
+
+    rng = np.random.default_rng(seed)
+    if mode == "grid":
+        configs = gridConfigs(search_space)
+    elif mode == "random":
+        configs = randomConfigs(search_space, no_samples, rng)
+    else:
+        raise ValueError(f"Unknown sweep mode '{mode}'. Use 'grid' or 'random'.")
+
+    # ! base_config : train_q_learning arguments for every key a search space does not set (the caller's settings).
+    # ! env_settings : createEnv arguments (grid_size, random_initialization, start_weights), default: the 9x9 field
+    env_settings = {'random_initialization': False, **(env_settings or {})}
+    configs = [{**base_config, **config} for config in configs]
+    # ! Independent, reproducible seed per configuration
+    seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(len(configs))]
+    jobs = [(index, config, seeds[index], goal_coordinates, danger_coordinates, env_settings, max_eval_steps)
+            for index, config in enumerate(configs)]
+
+    no_workers = no_workers or os.cpu_count() or 1
+    results = [None] * len(jobs)
+    best_key, best_index, best_q_table = None, None, None
+
+    with ProcessPoolExecutor(max_workers = no_workers) as pool:
+        for index, row, q_table in pool.map(runConfig, jobs):
+            results[index] = row
+            # ! Ranking: reached the goal, then success over all start cells, then evaluation reward, then fewer steps
+            key = (row['success'], row['success_rate'], np.nan_to_num(row['eval_reward'], nan = -np.inf), -row['eval_steps'])
+            if best_key is None or key > best_key:
+                best_key, best_index, best_q_table = key, index, q_table
+            print(f"Config {index + 1}/{len(jobs)}: Success: {row['success']} ({row['success_rate']:.0%} of starts), Eval Reward: {row['eval_reward']:.2f}, Steps: {row['eval_steps']}")
+
+    with open(results_path, "w", newline = "") as file:
+        writer = csv.DictWriter(file, fieldnames = list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+    # ! The best table is stored with its layout, the winning configuration and its evaluation (see QTableFile)
+    env = createEnv(goal_coordinates = goal_coordinates,
+                    danger_coordinates = danger_coordinates,
+                    sound = False,
+                    headless = True,
+                    compile_model = False,
+                    **env_settings)
+    best_row = results[best_index]
+    saveQTable(best_q_table, best_q_table_path, dtype = configs[best_index].get('q_dtype', "float64"), env = env,
+               hyperparameters = {**configs[best_index], 'seed': best_row['seed']},
+               stats = {key: best_row[key] for key in ('success', 'eval_reward', 'eval_steps', 'success_rate',
+                                                       'loop_rate', 'mean_eval_steps')})
+    env.close()
+    print(f"Sweep finished. Results: {results_path}, Best Q-table: {best_q_table_path}")
+
+    return results, best_q_table
@@ -0,0 +1,229 @@
+import numpy as np
+
+from GridModel import GridModel, RUNNING, GOAL, DANGER, transitionReward
+from StartSampler import StartSampler
+
+class VectorCustomEnv:
+    # ? Class Constructor
+    def __init__(self,
+                no_envs = 16,
+                grid_size = 9,
+                goal_coordinates = {
+                    'Bar1' : np.array([3, 8]),
+                    'Bar2' : np.array([4, 8]),
+                    'Bar3' : np.array([5, 8])
+                },
+                start_state = (4, 0),
+                autoreset = True,
+                seed = None,
+                random_initialization = False,
+                start_weights = None,
+                max_steps = None) -> None:
+
+        self.no_envs = no_envs
+        self.grid_size = grid_size
+        self.goal = goal_coordinates
+        self.goal_array = np.array([np.asarray(goal_coord) for goal_coord in goal_coordinates.values()], dtype = np.int64).reshape(-1, 2)
+        # ! States are flat cell indices: row * grid_size + col
+        self.start_state = int(start_state[0]) * grid_size + int(start_state[1])
+        self.autoreset = autoreset
+        self.n_actions = 4
+        self.rng = np.random.default_rng(seed)
+        # ! Start distribution, same options as CustomEnv (False : every episode starts at start_state)
+        self.random_initialization = "uniform" if random_initialization is True else random_initialization
+        self.start_weights = start_weights
+        self.start_sampler = None
+        # ! max_steps : episodes are cut off (done, info["Truncated"]) after this many steps. None : no limit.
+        self.max_steps = max_steps
+
+        # ! Same action order as CustomEnv.step -> Up: 0, Down: 1, Right: 2, Left: 3
+        self.moves = np.array([[-1, 0], [1, 0], [0, 1], [0, -1]], dtype = np.int64)
+        self.goal_cells = self.goal_array[:, 0] * grid_size + self.goal_array[:, 1]
+
+        self.danger_states = []
+        self.danger_cells = np.empty(0, dtype = np.int64)
+
+        # ! Compiled transition/reward tables (see compileModel). None -> array arithmetic per step.
+        self.model = None
+
+        # ! Per-episode state, one row/entry per parallel episode
+        self.states = np.full(no_envs, self.start_state, dtype = np.int64)
+        self.step_counts = np.zeros(no_envs, dtype = np.int64)
+        self.rewards = np.zeros(no_envs, dtype = np.float64)
+        self.distances = np.zeros(no_envs, dtype = np.float64)
+        self.dones = np.zeros(no_envs, dtype = bool)
+        self.info = {}
+
+    # ? Adding Danger States
+    def addDanger(self, coordinates, role):
+        self.danger_states.append({
+            'coordinates': coordinates,
+            'role': role
+        })
+        danger_array = np.array([each_danger['coordinates'] for each_danger in self.danger_states], dtype = np.int64).reshape(-1, 2)
+        self.danger_cells = danger_array[:, 0] * self.grid_size + danger_array[:, 1]
+        # Layout changed, compiled tables and start cells are stale
+        self.model = None
+        self.start_sampler = None
+
+    # ? Compiling the static layout into lookup tables
+    def compileModel(self):
+        self.model = GridModel.fromEnv(self, start_state = divmod(self.start_state, self.grid_size))
+        return self.model
+
+    # ? Start distribution over the safe cells (built once per layout, drawn with self.rng)
+    def startSampler(self):
+        if self.start_sampler is None:
+            if self.model is not None:
+                self.start_sampler = StartSampler(self.model.cell_outcome, mode = self.random_initialization, weights = self.start_weights)
+            else:
+                self.start_sampler = StartSampler.fromLayout(self.grid_size,
+                                                             goal_coordinates = self.goal.values(),
+                                                             danger_coordinates = [each_danger['coordinates'] for each_danger in self.danger_states],
+                                                             mode = self.random_initialization,
+                                                             weights = self.start_weights)
+        return self.start_sampler
+
+    # ? Distance between every agent and its nearest goal
+    def distanceToGoal(self, states):
+        # ! Euclidean Distance (Nearest) [sqrt( (x - x_i)^2 + (y - y_i)^2 )]
+        coordinates = np.stack(np.divmod(states, self.grid_size), axis = 1)
+        diff = coordinates[:, None, :] - self.goal_array[None, :, :]
+        return np.sqrt((diff * diff).sum(axis = 2)).min(axis = 1)
+
+    # ? Random actions for every parallel episode
+    def sampleActions(self):
+        return self.rng.integers(0, self.n_actions, size = self.no_envs)
+
+    # ? Resetting all (or the masked) episodes to a start cell
+    def reset(self, mask = None):
+        if mask is None:
+            mask = np.ones(self.no_envs, dtype = bool)
+
+        if self.random_initialization:
+            starts = self.startSampler().sample(self.rng, int(mask.sum()))
+        else:
+            starts = np.array([self.start_state])
+        self.states[mask] = starts
+        self.dones[mask] = False
+        self.rewards[mask] = 0
+        self.step_counts[mask] = 0
+        self.distances[mask] = self.model.cell_distance[starts] if self.model is not None else self.distanceToGoal(starts)
+
+        self.info["Distance to goal"] = self.distances.copy()
+
+        return self.states.copy(), self.info
+
+    # ? Agents' movement, one action per parallel episode
+    def step(self, actions):
+        actions = np.asarray(actions, dtype = np.int64)
+
+        # ! Fast path: table lookups instead of distance/goal/danger checks
+        if self.model is not None:
+            cells = self.states
+            self.states = self.model.next_state[cells, actions].astype(np.int64)
+            self.step_counts += 1
+            self.distances = self.model.distance[cells, actions]
+
+            outcome = self.model.outcome[cells, actions]
+            self.rewards = transitionReward(outcome, self.model.variable_point[cells, actions], self.rewards, self.step_counts)
+            self.dones = self.model.done[cells, actions]
+
+            return self.finishStep()
+
+        # ! Moves off the field are clipped back, same as the bound checks in CustomEnv.step
+        coordinates = np.stack(np.divmod(self.states, self.grid_size), axis = 1)
+        np.clip(coordinates + self.moves[actions], 0, self.grid_size - 1, out = coordinates)
+        self.states = coordinates[:, 0] * self.grid_size + coordinates[:, 1]
+        self.step_counts += 1
+
+        return self.checkTermination()
+
+    # ? Check Termination and Rewards (vectorized CustomEnv.checkTermination)
+    def checkTermination(self):
+        oldDistance = self.distances
+        newDistance = self.distanceToGoal(self.states)
+        self.distances = newDistance
+
+        # ! Position basis point
+        variablePoint = np.where(oldDistance > newDistance, 0.1, np.where(oldDistance == newDistance, 0.0, -0.2))
+
+        at_goal = np.isin(self.states, self.goal_cells)
+        at_danger = np.isin(self.states, self.danger_cells)
+
+        # ! Goal wins over danger, same priority as CustomEnv.checkTermination
+        outcome = np.where(at_goal, GOAL, np.where(at_danger, DANGER, RUNNING))
+        self.rewards = transitionReward(outcome, variablePoint, self.rewards, self.step_counts)
+        self.dones = outcome != RUNNING
+
+        return self.finishStep()
+
+    # ? Collecting step results and auto-resetting finished episodes
+    def finishStep(self):
+        if self.random_initialization == "visits":
+            self.startSampler().recordVisits(self.states)
+
+        truncated = np.zeros(self.no_envs, dtype = bool)
+        if self.max_steps is not None:
+            truncated = ~self.dones & (self.step_counts >= self.max_steps)
+            self.dones |= truncated
+
+        next_states = self.states.copy()
+        rewards = self.rewards.copy()
+        dones = self.dones.copy()
+
+        self.info = {
+            "Distance to goal": self.distances.copy(),
+            "Final state": next_states,
+            "Episode steps": self.step_counts.copy(),
+            "Truncated": truncated
+        }
+
+        # ! Finished episodes restart right away; "Final state" keeps where they ended
+        if self.autoreset and dones.any():
+            self.reset(dones)
+            next_states = self.states.copy()
+
+        return next_states, dones, rewards, self.info
+
+    # ? Dropping the masked episodes for good (no_envs shrinks, e.g. once a training budget is used up)
+    def retire(self, mask):
+        keep = ~np.asarray(mask, dtype = bool)
+        self.states, self.step_counts, self.rewards, self.distances, self.dones = (
+            self.states[keep], self.step_counts[keep], self.rewards[keep], self.distances[keep], self.dones[keep])
+        self.no_envs = int(keep.sum())
+
+    # ? Close Function
+    def close(self):
+        pass
+
+# ? Instance Creator
+def createVectorEnv(goal_coordinates,
+                    danger_coordinates,
+                    no_envs = 16,
+                    grid_size = 9,
+                    autoreset = True,
+                    seed = None,
+                    random_initialization = False,
+                    start_weights = None,
+                    max_steps = None,
+                    model = None):
+
+    env = VectorCustomEnv(no_envs = no_envs,
+                          grid_size = grid_size,
+                          goal_coordinates = goal_coordinates,
+                          autoreset = autoreset,
+                          seed = seed,
+                          random_initialization = random_initialization,
+                          start_weights = start_weights,
+                          max_steps = max_steps)
+
+    for danger in danger_coordinates:
+        env.addDanger(coordinates = danger['coordinates'], role = danger['role'])
+
+    # ! Layout is final now, compile it for the fast step path (model : tables already compiled for this layout)
+    env.model = model
+    if env.model is None:
+        env.compileModel()
+
+    return env
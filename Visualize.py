@@ -0,0 +1,122 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# ! Arrow direction per action in image coordinates (row axis points down): Up, Down, Right, Left
+ARROW_U = np.array([0, 0, 1, -1])
+ARROW_V = np.array([-1, 1, 0, 0])
+
+# ! One figure per worker process, reused for every snapshot it renders
+figure_cache = {}
+
+# ? Worker setup: headless matplotlib backend
+def workerInitializer():
+    import matplotlib
+    matplotlib.use("Agg")
+
+# ? Building (once per worker) the figure: 4 action heatmaps + greedy-policy arrow map
+def snapshotFigure(grid_size, n_actions, goal_cells, danger_cells, actions, annotate):
+    import matplotlib.pyplot as plt
+
+    key = (grid_size, n_actions, tuple(goal_cells), tuple(danger_cells), annotate)
+    if key in figure_cache:
+        return figure_cache[key]
+
+    fig, axes = plt.subplots(1, n_actions + 1, figsize = (4 * (n_actions + 1), 4.4), dpi = 80)
+    blank = np.ma.masked_all((grid_size, grid_size))
+    images, labels = [], []
+
+    for i, ax in enumerate(axes):
+        if i < n_actions:
+            images.append(ax.imshow(blank, cmap = "viridis", interpolation = "nearest"))
+            ax.set_title(f'Action: {actions[i]}')
+            labels.append([[ax.text(c, r, "", ha = 'center', va = 'center', color = 'white', fontsize = 7)
+                            for c in range(grid_size)] for r in range(grid_size)] if annotate else None)
+        else:
+            ax.imshow(np.zeros((grid_size, grid_size)), cmap = "Greys", vmin = 0, vmax = 1)
+            ax.set_title('Greedy policy')
+        ax.set_xticks([])
+        ax.set_yticks([])
+        for r, c in goal_cells:
+            ax.text(c, r, 'G', color = 'green', ha = 'center', va = 'center', weight = 'bold', fontsize = 12)
+        for r, c in danger_cells:
+            ax.text(c, r, 'H', color = 'red', ha = 'center', va = 'center', weight = 'bold', fontsize = 12)
+
+    rows, cols = np.mgrid[0:grid_size, 0:grid_size]
+    arrows = axes[-1].quiver(cols, rows, np.zeros((grid_size, grid_size)), np.zeros((grid_size, grid_size)),
+                             angles = 'xy', scale_units = 'xy', scale = 1.6, pivot = 'middle')
+    title = fig.suptitle("")
+    fig.tight_layout(rect = (0, 0, 1, 0.92))
+
+    mask = np.zeros((grid_size, grid_size), dtype = bool)
+    for r, c in list(goal_cells) + list(danger_cells):
+        mask[r, c] = True
+
+    figure_cache[key] = (fig, images, labels, arrows, title, mask)
+    return figure_cache[key]
+
+# ? Rendering one snapshot to PNG (runs inside a worker process)
+def renderSnapshot(job):
+    snapshot_path, index, episode, goal_cells, danger_cells, output_dir, actions, annotate_limit = job
+
+    stack = np.load(snapshot_path, mmap_mode = "r")
+    q_table = np.asarray(stack[index] if stack.ndim == 4 else stack, dtype = np.float64)
+    grid_size, _, n_actions = q_table.shape
+    annotate = grid_size <= annotate_limit
+
+    fig, images, labels, arrows, title, mask = snapshotFigure(grid_size, n_actions, goal_cells, danger_cells, actions, annotate)
+
+    for i in range(n_actions):
+        heatmap_data = np.ma.masked_array(q_table[:, :, i], mask = mask)
+        images[i].set_data(heatmap_data)
+        images[i].set_clim(heatmap_data.min(), heatmap_data.max())
+        if annotate:
+            for r in range(grid_size):
+                for c in range(grid_size):
+                    labels[i][r][c].set_text("" if mask[r, c] else f"{q_table[r, c, i]:.2f}")
+
+    greedy = q_table.argmax(axis = 2)
+    arrows.set_UVC(np.where(mask, 0, ARROW_U[greedy]), np.where(mask, 0, ARROW_V[greedy]))
+    title.set_text(f"Episode {episode}" if episode is not None else "")
+
+    # ! One Agg draw, then the raw buffer goes straight to the PNG encoder (savefig would draw again)
+    fig.canvas.draw()
+    path = os.path.join(output_dir, f"snapshot_{index:05d}.png")
+    Image.fromarray(np.asarray(fig.canvas.buffer_rgba())).save(path, compress_level = 1)
+    return path
+
+# ? Rendering every stacked Q-table snapshot in a process pool
+def render_snapshots(goal_coordinates,
+                     danger_coordinates,
+                     snapshot_path = "q_snapshots.npy",
+                     output_dir = "./Learning Data/snapshots",
+                     snapshot_every = None,
+                     indices = None,
+                     actions = ["Up", "Down", "Right", "Left"],
+                     annotate_limit = 15,
+                     no_workers = None):
+    # ! annotate_limit : largest grid that gets per-cell numbers (same default as visualize_q_table; text is ~3x the cost of the plots)
+
+    os.makedirs(output_dir, exist_ok = True)
+    goal_cells = [(int(g[0]), int(g[1])) for g in goal_coordinates.values()]
+    danger_cells = [(int(d['coordinates'][0]), int(d['coordinates'][1])) for d in danger_coordinates]
+
+    # ! Accepts a stacked (snapshots, grid, grid, actions) file or a single q_table.npy
+    stack = np.load(snapshot_path, mmap_mode = "r")
+    no_snapshots = stack.shape[0] if stack.ndim == 4 else 1
+    # ! An interrupted run leaves its unwritten rows as zeros at the end of the stack: those are skipped
+    while stack.ndim == 4 and no_snapshots > 0 and not stack[no_snapshots - 1].any():
+        no_snapshots -= 1
+    indices = range(no_snapshots) if indices is None else indices
+
+    jobs = [(snapshot_path, index, (index + 1) * snapshot_every if snapshot_every else None,
+             goal_cells, danger_cells, output_dir, actions, annotate_limit) for index in indices]
+
+    no_workers = no_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers = no_workers, initializer = workerInitializer) as pool:
+        paths = list(pool.map(renderSnapshot, jobs, chunksize = max(1, len(jobs) // (4 * no_workers))))
+
+    print(f"Rendered {len(paths)} snapshots to {output_dir}")
+    return paths
@@ -1,77 +1,420 @@
-import numpy as np
-
-from CustomEnv import createEnv
-from QLearning import train_q_learning, visualize_q_table, test_q_learning
-
-# ? Setting Flags
-# ! train = True : System will train the agent. train = False : It won't train.
-train = False
-# ! visualize_results = True : Save the learning data as image. visualize_results = False : It won't save.
-visualize_results = train
-# ! test = True : Only exploit using q_table.npy. test = False : It won't test.
-test = True
-# ! render = True : Render the Environment. render = False : It won't render.
-render = True
-# ! sound = True : Play sound. sound = False : It won't play.
-sound = True
-# TODO: "random_initialization" for future development. Initialize agent randomly.
-random_initialization = False  
-
-# ! Training Values
-learning_rate = 0.01    # ? Learning rate
-gamma = 0.99            # ? Discount factor
-epsilon = 1.0           # ? Exploration rate
-epsilon_min = 0.1       # ? Minimum exploration rate
-epsilon_decay = 0.995   # ? Decay rate for exploration
-no_episodes = 1_000     # ? Number of episodes
-
-# ! Environmental Values
-goal_coordinates = {
-    'Bar1' : np.array([3, 8]), 
-    'Bar2' : np.array([4, 8]), 
-    'Bar3' : np.array([5, 8])
+import argparse
+import json
+import os
+import sys
+
+# ! Heavy modules (pygame, seaborn/matplotlib, the sweep pool) are imported by the subcommand that needs them.
+# ! `python main.py test --no-render` only loads numpy, gymnasium and the training core.
+
+# ? Default Settings (overridden by --config <file.json / file.toml>, then by command line options)
+defaults = {
+    # ! Flags
+    'render': True,                 # ? Render the Environment
+    'sound': True,                  # ? Play sound
+    'render_fps': 10,               # ? Frames per second while rendering. None : unthrottled.
+    'batched': False,               # ? train: many episodes in lockstep on the compiled grid tables (no render/sound)
+    'visualize': True,              # ? train / plan: save the Q-table heatmaps afterwards
+    'evaluate': True,               # ? test: roll out the greedy policy from every start cell afterwards
+    'profile': None,                # ? None, "timers", "cprofile" or "sampling"
+    'profile_path': None,           # ? cProfile stats (.prof) / sampled stack counts, None : summary only
+    # ! random_initialization = False : every episode starts at [4, 0]. True / "uniform" : random safe cell,
+    # ! "visits" : rarely visited cells first, "weighted" : needs start_weights in createEnv (exploring starts)
+    'random_initialization': False,
+    # ! start_weights : for "weighted", one weight per cell as a (grid, grid) nested list or a .npy file path
+    'start_weights': None,
+    'random_q_init': False,         # ? Random initial Q-values instead of zeros
+
+    # ! Training Values
+    'learning_rate': 0.01,          # ? Learning rate
+    'gamma': 0.99,                  # ? Discount factor
+    'epsilon': 1.0,                 # ? Exploration rate
+    'epsilon_min': 0.1,             # ? Minimum exploration rate
+    'epsilon_decay': 0.995,         # ? Decay rate for exploration
+    'no_episodes': 1_000,           # ? Number of episodes
+    'q_backend': "dense",           # ? Q-table storage: "dense" or "hashed" (sparse, for very large grids)
+    'q_table_path': "q_table.qtb",  # ? Where the Q-table is saved / loaded (.qtb : checked against the layout on load)
+    'q_dtype': "float64",           # ? Stored precision of a .qtb table: "float64", "float32" or "float16"
+    'checkpoint_path': "checkpoint.npz",        # ? Training checkpoint (Q-table, epsilon, episode, RNG state)
+    'checkpoint_interval': 100,                 # ? Episodes between checkpoints (0 : only on interruption)
+    'resume': False,                            # ? Continue training from checkpoint_path
+    'metrics_path': "training_metrics.csv",     # ? Per-episode metrics (.csv / .jsonl / .npz)
+    'snapshot_every': 0,                        # ? Episodes between Q-table snapshots for the learning animation (0 : off)
+    'snapshot_path': "q_snapshots.npy",         # ? Stacked snapshots, rendered to ./Learning Data/snapshots
+    'planning_steps': 0,            # ? Dyna-Q: simulated updates per real step (0 : plain Q-learning)
+    'prioritized_sweeping': False,  # ? Dyna-Q: largest TD errors first instead of uniform replay
+    'trace_lambda': 0.0,            # ? Eligibility-trace decay lambda (0 : one-step updates)
+    'trace_type': "accumulating",   # ? "accumulating" or "replacing" traces
+    'trace_algorithm': "q",         # ? "q" : Watkins's Q(lambda), "sarsa" : SARSA(lambda)
+    'early_stopping': False,        # ? Stop training once Q-values, greedy policy and success rate settled
+    'stop_check_every': 50,         # ? Episodes between convergence checks
+    'stop_delta': None,             # ? Max |dQ| between two checks (None : not checked)
+    'stop_patience': 5,             # ? Checks without a greedy-policy change (None : not checked)
+    'stop_success_rate': 0.9,       # ? Goal rate over the last 100 episodes (None : not checked)
+    'max_test_steps': 200,          # ? Step limit of a test / evaluation episode
+    'planning_method': "value",     # ? "value" or "policy" iteration
+    'planning_tolerance': 1e-6,     # ? Convergence tolerance of the planner
+
+    # ! Sweep Values (lists -> grid search, {"range": [low, high]} / (low, high) tuples -> random search)
+    'sweep_mode': "grid",
+    'sweep_samples': 20,
+    'sweep_space': {
+        'alpha': [0.01, 0.05, 0.1],
+        'gamma': [0.9, 0.99],
+        'epsilon_decay': [0.99, 0.995]
+    },
+
+    # ! Layout Values (procedural fields, one Q-table per layout)
+    'layout_count': 1_000,          # ? Number of random layouts
+    'layout_defenders': 5,          # ? Defenders per layout (plus one goalkeeper)
+    'layout_method': "plan",        # ? "plan" (batched value iteration) or "train" (batched Q-learning)
+    'layout_seed': 0,
+    'layout_path': "layouts_q.npz", # ? Stacked Q-tables + layouts, rows sorted by layout hash
+
+    # ! Environmental Values
+    'grid_size': 9,
+    'goal_coordinates': {
+        'Bar1' : [3, 8],
+        'Bar2' : [4, 8],
+        'Bar3' : [5, 8]
+    },
+    'danger_coordinates': [
+        {"coordinates": (3, 2), "role": "D"},
+        {"coordinates": (5, 2), "role": "D"},
+        {"coordinates": (1, 5), "role": "D"},
+        {"coordinates": (4, 4), "role": "D"},
+        {"coordinates": (7, 5), "role": "D"},
+        {"coordinates": (4, 6), "role": "GK"}
+    ]
 }
 
-danger_coordinates = [
-    {"coordinates": (3, 2), "role": "D"},
-    {"coordinates": (5, 2), "role": "D"},
-    {"coordinates": (1, 5), "role": "D"},
-    {"coordinates": (4, 4), "role": "D"},
-    {"coordinates": (7, 5), "role": "D"},
-    {"coordinates": (4, 6), "role": "GK"}
-]
+# ? Reading a config file (JSON, or TOML on Python 3.11+)
+def loadConfig(path):
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as file:
+            config = tomllib.load(file)
+    else:
+        with open(path) as file:
+            config = json.load(file)
+
+    unknown = set(config) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown config keys in {path}: {', '.join(sorted(unknown))}")
+    return config
+
+# ? Layout in the form createEnv expects
+def layout(config):
+    import numpy as np
+
+    goal_coordinates = {name: np.array(coord) for name, coord in config['goal_coordinates'].items()}
+    danger_coordinates = [{"coordinates": tuple(danger['coordinates']), "role": danger['role']} for danger in config['danger_coordinates']]
+    return goal_coordinates, danger_coordinates
+
+# ? Start weights of the "weighted" start distribution (None : not given)
+def startWeights(config):
+    import numpy as np
+
+    weights = config['start_weights']
+    if weights is None:
+        return None
+    weights = np.load(weights) if isinstance(weights, str) else np.asarray(weights, dtype = np.float64)
+    if weights.size != config['grid_size'] ** 2:
+        raise ValueError(f"start_weights needs one weight per cell ({config['grid_size']}x{config['grid_size']}), got {weights.shape}.")
+    return weights
+
+def makeEnv(config, headless = None, sound = None, compile_model = True):
+    from CustomEnv import createEnv
+
+    goal_coordinates, danger_coordinates = layout(config)
+    return createEnv(goal_coordinates = goal_coordinates,
+                     danger_coordinates = danger_coordinates,
+                     random_initialization = config['random_initialization'],
+                     sound = config['sound'] if sound is None else sound,
+                     # ! headless : no pygame display/audio until env.render() is called
+                     headless = (not config['render']) if headless is None else headless,
+                     grid_size = config['grid_size'],
+                     compile_model = compile_model,
+                     render_fps = config['render_fps'],
+                     start_weights = startWeights(config))
+
+def makeProfiler(config):
+    if not config['profile']:
+        return None
+    from Profiling import Profiler
+    return Profiler(config['profile'], output_path = config['profile_path'])
+
+def makeEarlyStopping(config):
+    if not config['early_stopping']:
+        return None
+    from EarlyStopping import EarlyStopping
+    return EarlyStopping(check_every = config['stop_check_every'],
+                         delta_tolerance = config['stop_delta'],
+                         policy_patience = config['stop_patience'],
+                         success_rate = config['stop_success_rate'])
 
 # ! Training
-if train:
-    env = createEnv(goal_coordinates = goal_coordinates,
-                    danger_coordinates = danger_coordinates,
-                    random_initialization = random_initialization,
-                    sound = sound)
-
-    train_q_learning(env = env,
-                    no_episodes = no_episodes,
-                    epsilon = epsilon,
-                    epsilon_min = epsilon_min,
-                    epsilon_decay = epsilon_decay,
-                    alpha = learning_rate,
-                    gamma = gamma,
-                    random_init = random_initialization,
-                    render = render)
+def runTrain(config):
+    if config['batched']:
+        from QLearning import train_q_learning_batched
+
+        # ! Lockstep training never renders: no window, no mixer
+        train_q_learning_batched(env = makeEnv(config, headless = True, sound = False),
+                                no_episodes = config['no_episodes'],
+                                epsilon = config['epsilon'],
+                                epsilon_min = config['epsilon_min'],
+                                epsilon_decay = config['epsilon_decay'],
+                                alpha = config['learning_rate'],
+                                gamma = config['gamma'],
+                                q_table_save_path = config['q_table_path'],
+                                random_init = config['random_q_init'],
+                                q_dtype = config['q_dtype'])
+    else:
+        from Metrics import TrainingMetrics
+        from QLearning import train_q_learning
+
+        # ! The hashed backend is for fields too large for dense tables, so the dense GridModel isn't built either
+        train_q_learning(env = makeEnv(config, compile_model = config['q_backend'] != "hashed"),
+                        no_episodes = config['no_episodes'],
+                        epsilon = config['epsilon'],
+                        epsilon_min = config['epsilon_min'],
+                        epsilon_decay = config['epsilon_decay'],
+                        alpha = config['learning_rate'],
+                        gamma = config['gamma'],
+                        q_table_save_path = config['q_table_path'],
+                        random_init = config['random_q_init'],
+                        render = config['render'],
+                        q_backend = config['q_backend'],
+                        checkpoint_path = config['checkpoint_path'],
+                        checkpoint_interval = config['checkpoint_interval'],
+                        resume = config['resume'],
+                        metrics = TrainingMetrics(path = config['metrics_path']),
+                        snapshot_every = config['snapshot_every'],
+                        snapshot_path = config['snapshot_path'],
+                        profiler = makeProfiler(config),
+                        planning_steps = config['planning_steps'],
+                        prioritized_sweeping = config['prioritized_sweeping'],
+                        early_stopping = makeEarlyStopping(config),
+                        q_dtype = config['q_dtype'],
+                        trace_lambda = config['trace_lambda'],
+                        trace_type = config['trace_type'],
+                        trace_algorithm = config['trace_algorithm'])
+
+    if config['visualize']:
+        runVisualize(config)
+
+# ! Planning
+def runPlan(config):
+    from QLearning import plan_q_table
+
+    plan_q_table(env = makeEnv(config, headless = True, sound = False),
+                gamma = config['gamma'],
+                method = config['planning_method'],
+                tolerance = config['planning_tolerance'],
+                q_table_save_path = config['q_table_path'],
+                q_dtype = config['q_dtype'])
+
+    if config['visualize']:
+        runVisualize(config)
+
+# ! Sweeping
+def runSweep(config):
+    from Sweep import run_sweep
+
+    # JSON has no tuples: {"range": [low, high]} marks a random-search interval
+    search_space = {key: tuple(space['range']) if isinstance(space, dict) else space
+                    for key, space in config['sweep_space'].items()}
+    # ! Every training setting a search space doesn't vary comes from the config / command line
+    base_config = {
+        'no_episodes': config['no_episodes'],
+        'epsilon': config['epsilon'],
+        'epsilon_min': config['epsilon_min'],
+        'epsilon_decay': config['epsilon_decay'],
+        'alpha': config['learning_rate'],
+        'gamma': config['gamma'],
+        'random_init': config['random_q_init'],
+        'planning_steps': config['planning_steps'],
+        'prioritized_sweeping': config['prioritized_sweeping'],
+        'trace_lambda': config['trace_lambda'],
+        'trace_type': config['trace_type'],
+        'trace_algorithm': config['trace_algorithm']
+    }
+    env_settings = {
+        'grid_size': config['grid_size'],
+        'random_initialization': config['random_initialization'],
+        'start_weights': startWeights(config)
+    }
+    goal_coordinates, danger_coordinates = layout(config)
+    run_sweep(search_space = search_space,
+              goal_coordinates = goal_coordinates,
+              danger_coordinates = danger_coordinates,
+              base_config = base_config,
+              env_settings = env_settings,
+              mode = config['sweep_mode'],
+              no_samples = config['sweep_samples'],
+              max_eval_steps = config['max_test_steps'])
 
 # ! Visualizing
-if visualize_results:
+def runVisualize(config):
+    from QLearning import visualize_q_table
+
+    goal_coordinates, danger_coordinates = layout(config)
     visualize_q_table(danger_coordinates = danger_coordinates,
                       goal_coordinates = goal_coordinates,
-                      q_values_path = "q_table.npy")
-
-# ! Testing   
-if test:
-    env = createEnv(goal_coordinates = goal_coordinates,
-                    danger_coordinates = danger_coordinates,
-                    random_initialization = random_initialization,
-                    sound = sound)
-    
-    test_q_learning(env = env, 
-                    q_table_path = "q_table.npy", 
-                    render = render)
+                      q_values_path = config['q_table_path'],
+                      show = config['render'])
+
+    if config['snapshot_every'] and os.path.isfile(config['snapshot_path']):
+        from Visualize import render_snapshots
+
+        render_snapshots(goal_coordinates = goal_coordinates,
+                         danger_coordinates = danger_coordinates,
+                         snapshot_path = config['snapshot_path'],
+                         snapshot_every = config['snapshot_every'])
+
+# ! Testing
+def runTest(config):
+    from QLearning import test_q_learning
+    from QStorage import findQTable, loadQTable
+
+    # ! Resolved once: without q_table.qtb the shipped q_table.npy is used (with a warning)
+    q_table_path = findQTable(config['q_table_path'])
+    test_q_learning(env = makeEnv(config),
+                    q_table_path = q_table_path or config['q_table_path'],
+                    render = config['render'],
+                    max_steps = config['max_test_steps'],
+                    profiler = makeProfiler(config))
+
+    # ! Evaluating
+    if config['evaluate'] and q_table_path is not None:
+        from Evaluation import evaluate_policy, printEvaluation
+
+        env = makeEnv(config, headless = True, sound = False)
+        printEvaluation(evaluate_policy(env.model,
+                                        q_table = loadQTable(q_table_path, env = env),
+                                        max_steps = config['max_test_steps']))
+
+# ! Layouts
+def runLayouts(config):
+    from Layouts import generate_layouts, run_layouts, evaluate_layouts, save_layout_results
+
+    layouts = generate_layouts(config['layout_count'],
+                               grid_size = config['grid_size'],
+                               no_defenders = config['layout_defenders'],
+                               seed = config['layout_seed'])
+    q_tables = run_layouts(layouts,
+                           method = config['layout_method'],
+                           gamma = config['gamma'],
+                           no_episodes = config['no_episodes'],
+                           epsilon = config['epsilon'],
+                           epsilon_min = config['epsilon_min'],
+                           epsilon_decay = config['epsilon_decay'],
+                           alpha = config['learning_rate'],
+                           seed = config['layout_seed'])
+    success_rates = evaluate_layouts(layouts, q_tables, max_steps = config['max_test_steps'])
+    save_layout_results(config['layout_path'], layouts, q_tables, success_rates)
+
+    print(f"Layouts: {len(layouts)}, Method: {config['layout_method']}, Mean Success: {success_rates.mean():.1%}, "
+          f"Worst: {success_rates.min():.1%}. Saved to {config['layout_path']}")
+
+    # ! Robustness of the current Q-table on the generated fields
+    from QStorage import findQTable, loadQTable
+
+    q_table_path = findQTable(config['q_table_path'])
+    if q_table_path is not None:
+        shared = evaluate_layouts(layouts, loadQTable(q_table_path).toDense(), max_steps = config['max_test_steps'])
+        print(f"{q_table_path} on these layouts: Mean Success: {shared.mean():.1%}, Worst: {shared.min():.1%}")
+
+commands = {
+    'train': runTrain,
+    'test': runTest,
+    'visualize': runVisualize,
+    'plan': runPlan,
+    'sweep': runSweep,
+    'layouts': runLayouts
+}
+
+# ? Command line (every option defaults to SUPPRESS, so only options that were given override the config)
+def parseArguments(argv):
+    common = argparse.ArgumentParser(add_help = False, argument_default = argparse.SUPPRESS)
+    common.add_argument("--config", help = "JSON / TOML file with settings (keys as in main.defaults)")
+    common.add_argument("--q-table", dest = "q_table_path", help = "Q-table path (default q_table.qtb, .npy : bare array)")
+    common.add_argument("--render", dest = "render", action = "store_true", help = "Render the environment")
+    common.add_argument("--no-render", dest = "render", action = "store_false", help = "No window (headless)")
+    common.add_argument("--no-sound", dest = "sound", action = "store_false", help = "No sound")
+    common.add_argument("--fps", dest = "render_fps", type = int, help = "Render frames per second (0 : unthrottled)")
+    common.add_argument("--gamma", type = float, help = "Discount factor")
+    common.add_argument("--random-start", dest = "random_initialization", nargs = "?", const = "uniform",
+                        choices = ["uniform", "weighted", "visits"], help = "Exploring starts (weighted : needs --start-weights)")
+    common.add_argument("--start-weights", dest = "start_weights", help = ".npy file with one start weight per cell")
+    common.add_argument("--profile", choices = ["timers", "cprofile", "sampling"], help = "Per-phase timers / profiler")
+    common.add_argument("--profile-path", dest = "profile_path", help = "Where to dump the profile")
+
+    parser = argparse.ArgumentParser(description = "Q-learning on the penalty-area grid.")
+    subparsers = parser.add_subparsers(dest = "command")
+
+    train = subparsers.add_parser("train", parents = [common], argument_default = argparse.SUPPRESS, help = "Train the agent")
+    train.add_argument("--episodes", dest = "no_episodes", type = int, help = "Number of episodes")
+    train.add_argument("--alpha", dest = "learning_rate", type = float, help = "Learning rate")
+    train.add_argument("--epsilon", type = float, help = "Initial exploration rate")
+    train.add_argument("--epsilon-min", dest = "epsilon_min", type = float, help = "Minimum exploration rate")
+    train.add_argument("--epsilon-decay", dest = "epsilon_decay", type = float, help = "Exploration decay per episode")
+    train.add_argument("--batched", action = "store_true", help = "Lockstep batched training (no render/sound)")
+    train.add_argument("--backend", dest = "q_backend", choices = ["dense", "hashed"], help = "Q-table storage")
+    train.add_argument("--dyna", dest = "planning_steps", type = int, help = "Dyna-Q planning updates per real step")
+    train.add_argument("--prioritized", dest = "prioritized_sweeping", action = "store_true", help = "Dyna-Q with prioritized sweeping")
+    train.add_argument("--lambda", dest = "trace_lambda", type = float, help = "Eligibility traces, Q(lambda) / SARSA(lambda)")
+    train.add_argument("--traces", dest = "trace_type", choices = ["accumulating", "replacing"], help = "Trace type")
+    train.add_argument("--sarsa", dest = "trace_algorithm", action = "store_const", const = "sarsa", help = "SARSA(lambda) instead of Q(lambda)")
+    train.add_argument("--early-stopping", dest = "early_stopping", action = "store_true", help = "Stop once training converged")
+    train.add_argument("--resume", action = "store_true", help = "Continue from the checkpoint")
+    train.add_argument("--checkpoint", dest = "checkpoint_path", help = "Checkpoint path")
+    train.add_argument("--metrics", dest = "metrics_path", help = "Metrics file (.csv / .jsonl / .npz)")
+    train.add_argument("--snapshot-every", dest = "snapshot_every", type = int, help = "Episodes between Q-table snapshots")
+    train.add_argument("--no-visualize", dest = "visualize", action = "store_false", help = "Skip the heatmaps")
+    train.add_argument("--q-dtype", dest = "q_dtype", choices = ["float64", "float32", "float16"], help = "Stored precision (.qtb)")
+
+    test = subparsers.add_parser("test", parents = [common], argument_default = argparse.SUPPRESS, help = "Run the greedy policy")
+    test.add_argument("--max-steps", dest = "max_test_steps", type = int, help = "Step limit")
+    test.add_argument("--no-evaluate", dest = "evaluate", action = "store_false", help = "Skip the all-starts evaluation")
+
+    subparsers.add_parser("visualize", parents = [common], argument_default = argparse.SUPPRESS, help = "Save the Q-table heatmaps")
+
+    plan = subparsers.add_parser("plan", parents = [common], argument_default = argparse.SUPPRESS, help = "Value / policy iteration")
+    plan.add_argument("--method", dest = "planning_method", choices = ["value", "policy"])
+    plan.add_argument("--tolerance", dest = "planning_tolerance", type = float)
+    plan.add_argument("--no-visualize", dest = "visualize", action = "store_false", help = "Skip the heatmaps")
+    plan.add_argument("--q-dtype", dest = "q_dtype", choices = ["float64", "float32", "float16"], help = "Stored precision (.qtb)")
+
+    sweep = subparsers.add_parser("sweep", parents = [common], argument_default = argparse.SUPPRESS, help = "Hyperparameter sweep")
+    sweep.add_argument("--mode", dest = "sweep_mode", choices = ["grid", "random"])
+    sweep.add_argument("--samples", dest = "sweep_samples", type = int, help = "Random-search samples")
+
+    layouts = subparsers.add_parser("layouts", parents = [common], argument_default = argparse.SUPPRESS,
+                                    help = "Plan / train one Q-table per random layout")
+    layouts.add_argument("--count", dest = "layout_count", type = int, help = "Number of layouts")
+    layouts.add_argument("--defenders", dest = "layout_defenders", type = int, help = "Defenders per layout")
+    layouts.add_argument("--method", dest = "layout_method", choices = ["plan", "train"])
+    layouts.add_argument("--seed", dest = "layout_seed", type = int)
+    layouts.add_argument("--output", dest = "layout_path", help = "Results archive (.npz)")
+    layouts.add_argument("--episodes", dest = "no_episodes", type = int, help = "Episodes per layout (train)")
+    layouts.add_argument("--alpha", dest = "learning_rate", type = float, help = "Learning rate (train)")
+
+    return parser.parse_args(argv)
+
+def main(argv = None):
+    arguments = vars(parseArguments(sys.argv[1:] if argv is None else argv))
+    # ! No subcommand : test, as the old default flags did
+    command = arguments.pop('command', None) or "test"
+
+    config = dict(defaults)
+    config_path = arguments.pop('config', None)
+    if config_path is not None:
+        config.update(loadConfig(config_path))
+    config.update(arguments)
+    if config['render_fps'] == 0:
+        config['render_fps'] = None
+
+    commands[command](config)
 
+if __name__ == "__main__":
+    main()